@@ -0,0 +1,164 @@
+"""
+Headless work-precision benchmark: every Butcher table on every model problem with an exact
+solution (but the heat equation, see BENCHMARK_PROBLEMS), over fixed step counts and (for
+embedded pairs) adaptive tolerances.
+
+    python benchmark.py [output directory]
+
+Writes results.csv, results.json (runs and empirical convergence orders) and one
+work-precision figure per problem.
+"""
+import csv
+import dataclasses
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib import pyplot as plt
+
+from ode_models import ODEModel, ODE_PROBLEMS
+from butcher_tables import BUTCHER_TABLES, get_tableau
+from sweep import solver_for_tableau
+
+
+# problem_heat_equation is left out: its 2000 stiff equations make the explicit tables blow up
+# at the fixed step counts and crawl in adaptive mode, and the Newton iterations of the implicit
+# tables cannot reach NEWTON_TOLERANCE (1e-10 converges, e.g. main.solve with DIRKFourOrder).
+BENCHMARK_PROBLEMS = [
+    "problem_scalar_1", "problem_scalar_2",
+    "problem_nonatonomous_1", "problem_nonatonomous_2",
+    "problem_nonlinear_1", "problem_nonlinear_2",
+    "problem_system_1", "problem_imex_1",
+]
+STEP_COUNTS = [25, 50, 100, 200, 400]
+TOLERANCES = [1e-3, 1e-4, 1e-5, 1e-6, 1e-7, 1e-8]
+NEWTON_TOLERANCE = 1e-12
+
+
+def global_error(ode_problem: ODEModel, u):
+    """Max norm of the error over all solution points."""
+    exact = ode_problem.exact_test_solution(u[:, :1])
+    return float(np.max(np.abs(u[:, 1:] - exact)))
+
+
+def run(problem_name, method_name, steps=None, rtol=None):
+    """One solve, returns the record of the run."""
+    problem = ODE_PROBLEMS[problem_name]
+    tableau = get_tableau(method_name)
+    solver_class = solver_for_tableau(tableau)
+    ode_problem = dataclasses.replace(
+        problem, number_of_points_to_discretization=steps - 1 if steps else problem.number_of_points_to_discretization
+    )
+    record = {
+        "problem": problem_name, "method": method_name, "solver": solver_class.__name__,
+        "mode": "adaptive" if rtol else "fixed", "steps": steps, "rtol": rtol, "order": tableau.order,
+    }
+    start = time.perf_counter()
+    solver = solver_class.from_tableau(
+        ode_problem, tableau, NEWTON_TOLERANCE,
+        rtol=rtol, atol=None if rtol is None else rtol * 1e-2
+    )
+    try:
+        with np.errstate(all="ignore"):
+            u = solver.solve()
+        error = global_error(ode_problem, u)
+        status = "ok"
+    except ValueError as e:  # Newton did not converge, step size too small
+        u, error, status = None, float("nan"), str(e)
+    record.update({
+        "wall_time": time.perf_counter() - start,
+        "steps": len(u) - 1 if u is not None else steps,
+        "f_evaluations": solver.stats.f_evaluations,
+        "jacobian_evaluations": solver.stats.jacobian_evaluations,
+        "factorizations": solver.stats.factorizations,
+        "linear_solves": solver.stats.linear_solves,
+        "newton_iterations": solver.stats.newton_iterations,
+        "convergence_failures": solver.stats.convergence_failures,
+        "linear_solver_failures": solver.stats.linear_solver_failures,
+        "rejected_steps": solver.stats.rejected_steps,
+        "error": error,
+        "status": status,
+    })
+    return record
+
+
+def convergence_order(records):
+    """Slope of log(error) over log(h) of the fixed step runs (round-off dominated errors left out)."""
+    points = [(1. / r["steps"], r["error"]) for r in records if np.isfinite(r["error"]) and r["error"] > 1e-11]
+    if len(points) < 2:
+        return None
+    h, error = np.array(points).T
+    return float(np.polyfit(np.log(h), np.log(error), 1)[0])
+
+
+def run_benchmark(problems=BENCHMARK_PROBLEMS, methods=None, step_counts=STEP_COUNTS, tolerances=TOLERANCES):
+    records = []
+    for problem_name in problems:
+        for method_name in (methods or list(BUTCHER_TABLES)):
+            for steps in step_counts:
+                records.append(run(problem_name, method_name, steps=steps))
+            if get_tableau(method_name).is_embedded:
+                for rtol in tolerances:
+                    records.append(run(problem_name, method_name, rtol=rtol))
+    return records
+
+
+def empirical_orders(records):
+    orders = []
+    for problem_name in dict.fromkeys(r["problem"] for r in records):
+        for method_name in dict.fromkeys(r["method"] for r in records):
+            fixed = [r for r in records if r["problem"] == problem_name and r["method"] == method_name and r["mode"] == "fixed"]
+            if fixed:
+                orders.append({
+                    "problem": problem_name, "method": method_name,
+                    "order": fixed[0]["order"], "empirical_order": convergence_order(fixed),
+                })
+    return orders
+
+
+def plot_work_precision(records, directory):
+    for problem_name in dict.fromkeys(r["problem"] for r in records):
+        figure, axes = plt.subplots(1, 2, figsize=(12, 5))
+        for method_name in dict.fromkeys(r["method"] for r in records):
+            for mode, marker in (("fixed", "o-"), ("adaptive", "s--")):
+                runs = [
+                    r for r in records if r["problem"] == problem_name and r["method"] == method_name
+                    and r["mode"] == mode and np.isfinite(r["error"]) and r["error"] > 0
+                ]
+                if not runs:
+                    continue
+                error = [r["error"] for r in runs]
+                label = f"{method_name} ({mode})"
+                axes[0].loglog(error, [r["wall_time"] for r in runs], marker, label=label)
+                axes[1].loglog(error, [r["f_evaluations"] for r in runs], marker, label=label)
+        for ax, ylabel in zip(axes, ("wall time [s]", "f evaluations")):
+            ax.set_xlabel("global error")
+            ax.set_ylabel(ylabel)
+            ax.grid(True, which="both")
+        axes[1].legend(fontsize="x-small")
+        figure.suptitle(f"Work-precision: {problem_name}")
+        figure.savefig(os.path.join(directory, f"work_precision_{problem_name}.png"), dpi=120)
+        plt.close(figure)
+
+
+def write_results(records, directory):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "results.csv"), "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+    with open(os.path.join(directory, "results.json"), "w") as file:
+        json.dump({"runs": records, "convergence_orders": empirical_orders(records)}, file, indent=2)
+    plot_work_precision(records, directory)
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else "benchmark_results"
+    records = run_benchmark()
+    write_results(records, directory)
+    for order in empirical_orders(records):
+        print(f"{order['problem']:24} {order['method']:40} order {order['order']}, empirical {order['empirical_order']}")
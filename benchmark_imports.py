@@ -0,0 +1,64 @@
+"""
+Startup latency benchmark: wall time of fresh interpreters that import the package and run a
+short solve, and the heavy modules each of them loaded.
+
+    python benchmark_imports.py [repeats] [output json]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+HEAVY_MODULES = ["autograd", "scipy", "matplotlib", "numba"]
+SCENARIOS = {
+    "python": "pass",
+    "numpy": "import numpy",
+    "import ode_solvers": "import ode_solvers",
+    "import main": "import main",
+    "explicit solve": (
+        "import ode_solvers, ode_models, butcher_tables\n"
+        "ode_solvers.ExplicitRungeKutta.from_tableau(ode_models.problem_scalar_1, "
+        "butcher_tables.get_tableau('KuttaThirdOrderMethod'), 1e-8).solve()"
+    ),
+    "implicit solve": (
+        "import ode_solvers, ode_models, butcher_tables\n"
+        "ode_solvers.ImplicitRungeKutta.from_tableau(ode_models.problem_scalar_1, "
+        "butcher_tables.get_tableau('GaussLegendreSixOrder'), 1e-8).solve()"
+    ),
+}
+REPORT = "\nimport sys\nprint(','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+
+
+def run_scenario(code, repeats=5):
+    """Median wall time of repeats fresh interpreters running code, and the heavy modules they imported."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", code + REPORT],
+            cwd=directory, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(time.perf_counter() - start)
+    loaded = output.strip().splitlines()[-1] if output.strip() else ""
+    return sorted(timings)[len(timings) // 2], [m for m in loaded.split(",") if m]
+
+
+def run_benchmark(repeats=5):
+    records = []
+    for name, code in SCENARIOS.items():
+        seconds, loaded = run_scenario(code, repeats)
+        records.append({"scenario": name, "median_time": seconds, "heavy_modules": loaded})
+    return records
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    records = run_benchmark(repeats)
+    for record in records:
+        print(f"{record['scenario']:20} {1000 * record['median_time']:8.1f} ms   {', '.join(record['heavy_modules']) or '-'}")
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w") as file:
+            json.dump(records, file, indent=2)
@@ -1,4 +1,7 @@
 import numpy as np
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Union
 
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -7,7 +10,7 @@ import numpy as np
 
 
 def ForwardEuler():
-    A = np.array([0])
+    A = np.array([[0]])
     b = np.array([1])
     c = np.array([0])
     return A, b, c
@@ -64,11 +67,11 @@ def CrankNicolsonMethodSecondOrder():  # order 2
 
 
 # Diagonally Implicit Runge–Kutta 
-def DIRKThirdOrder():  # order 4
+def DIRKThirdOrder():  # order 3, L-stable
     A = np.array([
         [1/2, 0, 0, 0], 
         [1/6, 1/2, 0, 0], 
-        [-1/2, -1/2, 1/2, 0],
+        [-1/2, 1/2, 1/2, 0],
         [3/2, -3/2, 1/2, 1/2],
     ])
     b = np.array([3/2, -3/2, 1/2, 1/2])
@@ -93,3 +96,336 @@ def DIRKFourOrder():  # order 4
 
 
 
+
+
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# EMBEDDED PAIRS (adaptive step-size control):
+# every pair returns A, b, c, b_hat, order of b_hat
+# y_{n+1} uses b, the error estimate is h * sum((b_j - b_hat_j) * Y'_j)
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def HeunEulerMethod():  # order 2(1)
+    A, b, c = ExplicitMidpointMethod()
+    b_hat = np.array([1., 0])
+    return A, b, c, b_hat, 1
+
+
+def BogackiShampineMethod():  # order 3(2)
+    A = np.array([
+        [0, 0, 0, 0],
+        [1./2., 0, 0, 0],
+        [0, 3./4., 0, 0],
+        [2./9., 1./3., 4./9., 0]
+    ])
+    b = np.array([2./9., 1./3., 4./9., 0])
+    b_hat = np.array([7./24., 1./4., 1./3., 1./8.])
+    c = np.array([0, 1./2., 3./4., 1.])
+    return A, b, c, b_hat, 2
+
+
+def DormandPrinceMethod():  # order 5(4)
+    A = np.array([
+        [0, 0, 0, 0, 0, 0, 0],
+        [1/5, 0, 0, 0, 0, 0, 0],
+        [3/40, 9/40, 0, 0, 0, 0, 0],
+        [44/45, -56/15, 32/9, 0, 0, 0, 0],
+        [19372/6561, -25360/2187, 64448/6561, -212/729, 0, 0, 0],
+        [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656, 0, 0],
+        [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0]
+    ])
+    b = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+    b_hat = np.array([5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+    c = np.array([0, 1/5, 3/10, 4/5, 8/9, 1, 1])
+    return A, b, c, b_hat, 4
+
+
+def GaussLegendreSixOrderEmbedded():  # order 6(3)
+    # no b_hat on the three Gauss stages is better than order 2, so an explicit stage f(t_n, y_n) with
+    # b_0 = 0 is added in front (Radau IIA style): b_hat = b + gamma_0 * w with the weights w (w_0 = 1)
+    # of the third divided difference on the nodes (0, c), exact for the quadratics, so b_hat has order 3.
+    # gamma_0 = 1/10 takes 77 steps on problem_system_1 at rtol = 1e-6 (the order 2 b_hat took 624)
+    A, b, c = GaussLegendreSixOrder()
+    gamma_0 = 1/10
+    nodes = np.r_[0, c]
+    w = np.array([1 / np.prod(node - np.delete(nodes, i)) for i, node in enumerate(nodes)])
+    A = np.block([[np.zeros((1, 4))], [np.zeros((3, 1)), A]])
+    b_hat = np.r_[0, b] + gamma_0 * w / w[0]
+    return A, np.r_[0, b], nodes, b_hat, 3
+
+
+def CrankNicolsonMethodSecondOrderEmbedded():  # order 2(1)
+    A, b, c = CrankNicolsonMethodSecondOrder()
+    b_hat = np.array([1., 0])  # forward Euler
+    return A, b, c, b_hat, 1
+
+
+def DIRKFourOrderEmbedded():  # order 4(3), Hairer & Wanner SDIRK4
+    A, b, c = DIRKFourOrder()
+    b_hat = np.array([59/48, -17/96, 225/32, -85/12, 0])
+    return A, b, c, b_hat, 3
+
+
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# IMEX PAIRS (additive Runge-Kutta, f = f_implicit + f_explicit):
+# every pair returns A_explicit, b_explicit, A_implicit, b_implicit, c (the stages share the nodes c)
+# the implicit table is DIRK with one nonzero diagonal element gamma, one LU factorization per step
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def IMEXEulerMethod():  # order 1, forward/backward Euler
+    A_explicit = np.array([
+        [0, 0],
+        [1., 0]
+    ])
+    b_explicit = np.array([1., 0])
+    A_implicit = np.array([
+        [0, 0],
+        [0, 1.]
+    ])
+    b_implicit = np.array([0, 1.])
+    c = np.array([0, 1.])
+    return A_explicit, b_explicit, A_implicit, b_implicit, c
+
+
+def ARS222Method():  # order 2, Ascher, Ruuth & Spiteri (1997), L-stable implicit part
+    gamma = 1 - 1 / np.sqrt(2)
+    delta = 1 - 1 / (2 * gamma)
+    A_explicit = np.array([
+        [0, 0, 0],
+        [gamma, 0, 0],
+        [delta, 1 - delta, 0]
+    ])
+    b_explicit = np.array([delta, 1 - delta, 0])
+    A_implicit = np.array([
+        [0, 0, 0],
+        [0, gamma, 0],
+        [0, 1 - gamma, gamma]
+    ])
+    b_implicit = np.array([0, 1 - gamma, gamma])
+    c = np.array([0, gamma, 1.])
+    return A_explicit, b_explicit, A_implicit, b_implicit, c
+
+
+def ARS443Method():  # order 3, Ascher, Ruuth & Spiteri (1997), L-stable implicit part
+    A_explicit = np.array([
+        [0, 0, 0, 0, 0],
+        [1/2, 0, 0, 0, 0],
+        [11/18, 1/18, 0, 0, 0],
+        [5/6, -5/6, 1/2, 0, 0],
+        [1/4, 7/4, 3/4, -7/4, 0]
+    ])
+    b_explicit = np.array([1/4, 7/4, 3/4, -7/4, 0])
+    A_implicit = np.array([
+        [0, 0, 0, 0, 0],
+        [0, 1/2, 0, 0, 0],
+        [0, 1/6, 1/2, 0, 0],
+        [0, -1/2, 1/2, 1/2, 0],
+        [0, 3/2, -3/2, 1/2, 1/2]
+    ])
+    b_implicit = np.array([0, 3/2, -3/2, 1/2, 1/2])
+    c = np.array([0, 1/2, 2/3, 1/2, 1.])
+    return A_explicit, b_explicit, A_implicit, b_implicit, c
+
+
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# TABLEAU REGISTRY:
+# immutable tableau objects with precomputed properties, built once per table and cached
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+BUTCHER_TABLES = {
+    method.__name__: method for method in [
+        ForwardEuler, ExplicitMidpointMethod, KuttaThirdOrderMethod,
+        GaussLegendreSixOrder, CrankNicolsonMethodSecondOrder, DIRKThirdOrder, DIRKFourOrder,
+        HeunEulerMethod, BogackiShampineMethod, DormandPrinceMethod,
+        GaussLegendreSixOrderEmbedded, CrankNicolsonMethodSecondOrderEmbedded, DIRKFourOrderEmbedded,
+    ]
+}
+
+
+@lru_cache(maxsize=None)
+def rooted_trees(order):
+    """All rooted trees with order vertices, a tree is the sorted tuple of the subtrees of its root."""
+    if order == 1:
+        return [()]
+    trees = []
+
+    def forests(remaining, smallest):  # multisets of trees with remaining vertices, in canonical order
+        if remaining == 0:
+            yield ()
+            return
+        for size in range(1, remaining + 1):
+            for tree in rooted_trees(size):
+                if (size, tree) < smallest:
+                    continue
+                for rest in forests(remaining - size, (size, tree)):
+                    yield ((size, tree),) + rest
+
+    for forest in forests(order - 1, (0, ())):
+        trees.append(tuple(forest))
+    return trees
+
+
+def tree_density(tree, order):
+    """gamma(t) = |t| * product of gamma of the subtrees."""
+    gamma = order
+    for size, subtree in tree:
+        gamma *= tree_density(subtree, size)
+    return gamma
+
+
+def elementary_weights(A, tree):
+    """Phi(t) per stage: product over the subtrees u of A @ Phi(u), 1 for the single vertex."""
+    weights = np.ones(len(A))
+    for size, subtree in tree:
+        weights = weights * (A @ elementary_weights(A, subtree))
+    return weights
+
+
+def classical_order(A, b, max_order=8, tol=1e-10):
+    """The largest p such that b @ Phi(t) = 1 / gamma(t) for every rooted tree t with |t| <= p."""
+    for order in range(1, max_order + 1):
+        for tree in rooted_trees(order):
+            if abs(b @ elementary_weights(A, tree) - 1. / tree_density(tree, order)) > tol:
+                return order - 1
+    return max_order
+
+
+def read_only(array):
+    if array is None:
+        return None
+    array = np.array(array, dtype=float)
+    array.setflags(write=False)
+    return array
+
+
+@dataclass(frozen=True, eq=False)
+class ButcherTableau:
+    """
+    Butcher tableau with the properties the solvers need, computed once at construction:
+    order (verified from the order conditions), structure ("explicit", "SDIRK", "DIRK" or "implicit"),
+    A_inv, eigendecomposition A = T * diag(eigenvalues) * T^-1, stiff accuracy and stability data.
+    """
+    name: str
+    A: np.ndarray
+    b: np.ndarray
+    c: np.ndarray
+    b_hat: Union[np.ndarray, None] = None
+    embedded_order: Union[int, None] = None  # verified order of b_hat
+    order: int = field(init=False)
+    structure: str = field(init=False)
+    A_inv: Union[np.ndarray, None] = field(init=False)  # None when A is singular
+    eigenvalues: np.ndarray = field(init=False)
+    T: Union[np.ndarray, None] = field(init=False)  # None when A is not diagonalizable
+    T_inv: Union[np.ndarray, None] = field(init=False)
+    stiffly_accurate: bool = field(init=False)  # b equals the last row of A
+    R_infinity: Union[float, None] = field(init=False)  # stability function at infinity, None for explicit tables
+    real_stability_interval: float = field(init=False)  # |R(-x)| <= 1 for 0 <= x <= this (scanned up to 100)
+
+    def __post_init__(self):
+        set_field = lambda name, value: object.__setattr__(self, name, value)
+        A = read_only(np.atleast_2d(self.A))
+        b, c, b_hat = read_only(self.b), read_only(self.c), read_only(self.b_hat)
+        set_field('A', A)
+        set_field('b', b)
+        set_field('c', c)
+        set_field('b_hat', b_hat)
+        if b_hat is not None:
+            set_field('embedded_order', classical_order(A, b_hat))
+        set_field('order', classical_order(A, b))
+
+        if not np.any(np.triu(A)):
+            structure = "explicit"
+        elif not np.any(np.triu(A, 1)):
+            diagonal = np.diag(A)
+            structure = "SDIRK" if np.all(diagonal == diagonal[0]) else "DIRK"
+        else:
+            structure = "implicit"
+        set_field('structure', structure)
+
+        singular = abs(np.linalg.det(A)) < 1e-14
+        set_field('A_inv', None if singular else read_only(np.linalg.inv(A)))
+        eigenvalues, T = np.linalg.eig(A)
+        diagonalizable = np.linalg.cond(T) < 1e8
+        set_field('eigenvalues', eigenvalues)
+        set_field('T', T if diagonalizable else None)
+        set_field('T_inv', np.linalg.inv(T) if diagonalizable else None)
+
+        set_field('stiffly_accurate', bool(np.allclose(A[-1], b)))
+        if structure == "explicit":
+            R_infinity = None  # R is a polynomial
+        elif singular:
+            R_infinity = float(np.real(self.stability_function(-1e10)))
+        else:
+            R_infinity = float(1 - b @ self.A_inv @ np.ones(len(b)))
+        set_field('R_infinity', R_infinity)
+        x = np.linspace(0, 100, 10001)
+        unstable = np.abs(self.stability_function(-x)) > 1 + 1e-12
+        set_field('real_stability_interval', float(x[np.argmax(unstable) - 1]) if np.any(unstable) else np.inf)
+
+    @property
+    def s(self):
+        return len(self.b)
+
+    @property
+    def is_explicit(self):
+        return self.structure == "explicit"
+
+    @property
+    def is_embedded(self):
+        return self.b_hat is not None
+
+    def stability_function(self, z):
+        """R(z) = 1 + z * b^T (I - z*A)^-1 * 1, vectorized over z."""
+        z = np.asarray(z, dtype=complex)
+        matrices = np.eye(self.s) - z.reshape(-1, 1, 1) * self.A
+        ones = np.ones((z.size, self.s, 1))
+        R = 1 + z.ravel() * (self.b @ np.linalg.solve(matrices, ones)[..., 0].T)
+        R = R.reshape(z.shape)
+        return R.real if np.allclose(R.imag, 0) else R
+
+    def arrays(self):
+        """A, b, c (and b_hat, embedded_order for an embedded pair), like the table functions."""
+        if self.is_embedded:
+            return self.A, self.b, self.c, self.b_hat, self.embedded_order
+        return self.A, self.b, self.c
+
+
+tableau_cache = {}
+
+
+def get_tableau(method: Union[Callable, str]) -> ButcherTableau:
+    """The cached ButcherTableau of a table function (or its name in BUTCHER_TABLES)."""
+    name = method if isinstance(method, str) else method.__name__
+    if name not in tableau_cache:
+        function = BUTCHER_TABLES[name] if isinstance(method, str) else method
+        A, b, c, *embedded = function()
+        b_hat = embedded[0] if embedded else None
+        tableau_cache[name] = ButcherTableau(name, A, b, c, b_hat)
+    return tableau_cache[name]
+
+
+def tableau_from_arrays(A, b, c, b_hat=None) -> ButcherTableau:
+    """The cached ButcherTableau of raw arrays, for solvers constructed without a registry table."""
+    key = tuple(None if x is None else np.asarray(x, dtype=float).tobytes() for x in (A, b, c, b_hat))
+    if key not in tableau_cache:
+        tableau_cache[key] = ButcherTableau("custom", A, b, c, b_hat)
+    return tableau_cache[key]
+
+
+IMEX_TABLES = {method.__name__: method for method in [IMEXEulerMethod, ARS222Method, ARS443Method]}
+imex_tableau_cache = {}
+
+
+def get_imex_tableaux(method: Union[Callable, str]):
+    """The cached (explicit, implicit) ButcherTableau pair of an IMEX table function (or its name in IMEX_TABLES)."""
+    name = method if isinstance(method, str) else method.__name__
+    if name not in imex_tableau_cache:
+        function = IMEX_TABLES[name] if isinstance(method, str) else method
+        A_explicit, b_explicit, A_implicit, b_implicit, c = function()
+        imex_tableau_cache[name] = (
+            ButcherTableau(f"{name} (explicit)", A_explicit, b_explicit, c),
+            ButcherTableau(f"{name} (implicit)", A_implicit, b_implicit, c),
+        )
+    return imex_tableau_cache[name]
@@ -1,32 +1,121 @@
+import os
 import numpy as np
-from matplotlib import pyplot as plt
-from typing import Callable
+from typing import Callable, Union
 
 import ode_solvers
+import sweep
+import parareal
 
 from ode_models import *
 from plot_tools import *
 from butcher_tables import *
+from rosenbrock_tables import get_rosenbrock_tableau
+from result_cache import ResultCache, cache_key
 
 
+DEFAULT_RESULT_CACHE = ResultCache()  # ~/.cache/ode_results, opt-in: solve(..., cache=DEFAULT_RESULT_CACHE)
+
 
 def solve(
     ode_problem: ODEModel,              # differential problem, which we want to solve,
     ode_solver: ode_solvers.ODESolver,  # ODE solver
-    method: Callable,                   # Butcher matrix funciton
-    tol: float                          # tolerance
+    method: Union[Callable, str],       # Butcher matrix funciton (or its name in BUTCHER_TABLES)
+    tol: float,                         # tolerance
+    rtol: float = None,                 # relative tolerance, enables adaptive step size (embedded pairs only)
+    atol: float = None,                 # absolute tolerance, enables adaptive step size (embedded pairs only)
+    cache: ResultCache = None,          # on-disk result cache (e.g. DEFAULT_RESULT_CACHE), None solves every time
+    **solver_options                    # further solver options, e.g. save_every=k, output_file="u.npy", stats=SolverStatistics()
+):
+    """
+    Returns the N x (1 + m) solution. With a cache, identical (problem, table, solver, tolerances, options)
+    combinations are read from it, runs writing to an output_file and options without a fingerprint are not cached.
+    """
+    tableau = get_tableau(method)
+    key = None
+    if cache is not None and solver_options.get("output_file") is None:
+        options = {name: value for name, value in solver_options.items() if name != "stats"}  # filled by the solve, not an input
+        key = cache_key(ode_problem, tableau, ode_solver, tol, rtol, atol, **options)
+    if key is not None:
+        u = cache.get(key)
+        if u is not None:
+            return u
+    solver = ode_solver.from_tableau(ode_problem, tableau, tol, rtol=rtol, atol=atol, **solver_options)
+    u = solver.solve()
+    if key is not None:
+        cache.put(key, u)
+    return u
+
+
+def solve_dense(
+    ode_problem: ODEModel,              # differential problem, which we want to solve,
+    ode_solver: ode_solvers.ODESolver,  # ODE solver
+    method: Union[Callable, str],       # Butcher matrix funciton (or its name in BUTCHER_TABLES)
+    tol: float,                         # tolerance
+    rtol: float = None,                 # relative tolerance, enables adaptive step size (embedded pairs only)
+    atol: float = None                  # absolute tolerance, enables adaptive step size (embedded pairs only)
 ):
-    A, b, c = method()
-    solver = ode_solver(ode_problem, A, b, c, tol)
+    """Returns the continuous solution, a callable u(t) for arbitrary t in [t0, T]."""
+    solver = ode_solver.from_tableau(ode_problem, get_tableau(method), tol, rtol=rtol, atol=atol, dense_output=True)
+    solver.solve()
+    return solver.sol
+
+
+def solve_imex(
+    ode_problem: ODEModel,              # split differential problem (f_implicit and f_explicit)
+    method: Union[Callable, str],       # IMEX pair function (or its name in IMEX_TABLES)
+    tol: float,                         # tolerance
+    **solver_options                    # further solver options, e.g. save_every=k, output_file="u.npy"
+):
+    """Only the stiff part f_implicit is solved implicitly, f_explicit is evaluated once per stage."""
+    solver = ode_solvers.IMEXRungeKutta.from_pair(ode_problem, method, tol, **solver_options)
     return solver.solve()
 
+
+def solve_rosenbrock(
+    ode_problem: ODEModel,              # differential problem, which we want to solve,
+    method: Union[Callable, str],       # Rosenbrock table function (or its name in ROSENBROCK_TABLES)
+    tol: float,                         # tolerance
+    rtol: float = None,                 # relative tolerance, enables adaptive step size (embedded pairs only)
+    atol: float = None,                 # absolute tolerance, enables adaptive step size (embedded pairs only)
+    **solver_options                    # further solver options, e.g. reuse_jacobian=True (W-methods only)
+):
+    """Linearly implicit: one LU factorization and s linear solves per step, no Newton iteration."""
+    solver = ode_solvers.RosenbrockMethod.from_tableau(
+        ode_problem, get_rosenbrock_tableau(method), tol, rtol=rtol, atol=atol, **solver_options
+    )
+    return solver.solve()
+
+
+def solve_ensemble(
+    ode_problem: ODEModel,              # differential problem, which we want to solve,
+    ode_solver: ode_solvers.ODESolver,  # ODE solver
+    method: Union[Callable, str],       # Butcher matrix funciton (or its name in BUTCHER_TABLES)
+    tol: float,                         # tolerance
+    y0: np.array,                       # N x m batch of initial conditions
+    params: np.array = None             # N x k batch of parameter vectors (or one k vector for all)
+):
+    """
+    Solves N trajectories of one problem together, every step advances the whole batch.
+    Returns time points (length n) and the n x N x m solutions.
+    """
+    y0 = np.asarray(y0, dtype=float)
+    params = None if params is None else np.asarray(params, dtype=float)
+    solver = ode_solver.from_tableau(ode_problem, get_tableau(method), tol, y0=y0, params=params)
+    u = solver.solve()
+    return u[:, 0], u[:, 1:].reshape((len(u),) + y0.shape)
+
     
 
 
-def solve_ode_test(
-    ode_problem: ODEModel,          # differential problem, which we want to solve
-    tol=1e-5                        # tolerance
+def plot_ode_test(
+    ode_problem: Union[ODEModel, str],  # differential problem, which we want to solve (or its name in ODE_PROBLEMS)
+    tol=1e-5,                           # tolerance
+    max_points=MAX_PLOT_POINTS,         # points drawn per line (min/max decimation), None draws every point
+    cache: ResultCache = None           # on-disk result cache of the solves, see solve
 ):
+    """Solves the problem with all test methods, returns the figure with one subplot per method."""
+    if isinstance(ode_problem, str):
+        ode_problem = ODE_PROBLEMS[ode_problem]
     test_explicit_methods = [ExplicitMidpointMethod, KuttaThirdOrderMethod]
     tests_implicit_methods = [GaussLegendreSixOrder, CrankNicolsonMethodSecondOrder]
     tests_diagonally_implicit_methods = [DIRKThirdOrder, DIRKFourOrder]
@@ -52,10 +141,11 @@ def solve_ode_test(
             ode_problem=ode_problem,
             ode_solver=ode_solvers.ExplicitRungeKutta,
             method=method,
-            tol=tol
+            tol=tol,
+            cache=cache
         )
         # plot result:
-        axes[k].plot(u[:,0], u[:,1] + noise, color='red', label=f"{method.__name__}")
+        plot_decimated(axes[k], u[:,0], u[:,1] + noise, color='red', label=f"{method.__name__}", max_points=max_points)
         if ode_problem.exact_test_solution:
             axes[k].plot(time_points_exact, exact_solution, label="Exact solution")
         axes[k].grid(True)
@@ -70,10 +160,11 @@ def solve_ode_test(
             ode_problem=ode_problem,
             ode_solver=ode_solvers.ImplicitRungeKutta,
             method=method,
-            tol=tol
+            tol=tol,
+            cache=cache
         )
         # plot result:
-        axes[k].plot(u[:,0], u[:,1] + noise, color='red', label=f"{method.__name__}")
+        plot_decimated(axes[k], u[:,0], u[:,1] + noise, color='red', label=f"{method.__name__}", max_points=max_points)
         if ode_problem.exact_test_solution:
             axes[k].plot(time_points_exact, exact_solution, label="Exact solution")
         axes[k].grid(True)
@@ -88,16 +179,33 @@ def solve_ode_test(
             ode_problem=ode_problem,
             ode_solver=ode_solvers.DiagonallyImplicitRungeKutta,
             method=method,
-            tol=tol
+            tol=tol,
+            cache=cache
         )
         # plot result:
-        axes[k].plot(u[:,0], u[:,1] + noise, color='red', label=f"{method.__name__}")
+        plot_decimated(axes[k], u[:,0], u[:,1] + noise, color='red', label=f"{method.__name__}", max_points=max_points)
         if ode_problem.exact_test_solution:
             axes[k].plot(time_points_exact, exact_solution, label="Exact solution")
         axes[k].grid(True)
         axes[k].set_title("Diagonally Implicit Runge Kutta")
         axes[k].legend()
-    figure.canvas.set_window_title("Solution for ode problem")
+    if figure.canvas.manager is not None:
+        figure.canvas.manager.set_window_title("Solution for ode problem")
+    return figure
+
+
+def solve_ode_test(
+    ode_problem: Union[ODEModel, str],  # differential problem, which we want to solve (or its name in ODE_PROBLEMS)
+    tol=1e-5,                           # tolerance
+    output_file: str = None,            # the figure is written to this file (png, pdf, svg, ...) instead of shown
+    cache: ResultCache = None           # on-disk result cache of the solves, see solve
+):
+    if output_file is not None:
+        use_headless_backend()  # before the figure is created, switching the backend closes the open figures
+        save_figure(plot_ode_test(ode_problem, tol, cache=cache), output_file)
+        return
+    plot_ode_test(ode_problem, tol, cache=cache)
+    from matplotlib import pyplot as plt  # only the interactive examples load matplotlib
     plt.show()
 
 
@@ -134,6 +242,47 @@ def example_nonlinear_ode_2():
     solve_ode_test(ode_problem=problem_nonlinear_2)
 
 
+def example_adaptive_step_size(rtol=1e-6, atol=1e-8):
+    tests = [
+        (ode_solvers.ExplicitRungeKutta, DormandPrinceMethod),
+        (ode_solvers.ImplicitRungeKutta, GaussLegendreSixOrderEmbedded),
+        (ode_solvers.DiagonallyImplicitRungeKutta, DIRKFourOrderEmbedded),
+    ]
+    for ode_solver, method in tests:
+        solver = ode_solver.from_tableau(problem_nonatonomous_2, get_tableau(method), 1e-10, rtol=rtol, atol=atol)
+        u = solver.solve()
+        error = np.abs(u[-1, 1] - problem_nonatonomous_2.exact_test_solution(u[-1, 0]))
+        print(
+            f"{method.__name__}: accepted steps = {solver.stats.accepted_steps}, "
+            f"rejected steps = {solver.stats.rejected_steps}, error at T = {error.item():.2e}"
+        )
+
+
+def example_parallel_sweep(processes=None):
+    # the problems and methods of the examples above, all solved at once in a process pool,
+    # unchanged combinations are read from the result cache on later runs:
+    results = sweep.run_sweep(sweep.sweep_tasks(), processes=processes, cache=DEFAULT_RESULT_CACHE)
+    sweep.plot_sweep(results)
+
+
+def example_headless_plots(directory="figures", processes=None):
+    # the figures of the examples above written to png files, rendered in parallel (no display needed):
+    problems = [
+        "problem_scalar_1", "problem_scalar_2", "problem_nonatonomous_1",
+        "problem_nonatonomous_2", "problem_nonlinear_1", "problem_nonlinear_2",
+    ]
+    jobs = [FigureJob(os.path.join(directory, f"{name}.png"), plot_ode_test, (name,)) for name in problems]
+    for path in render_figures(jobs, processes):
+        print(f"saved {path}")
+
+
+def example_parareal(slices=16):
+    # one long trajectory, the fine Gauss-Legendre solves of the time slices run in parallel:
+    u, iterations = parareal.solve_parareal("problem_system_1", slices)
+    error = np.max(np.abs(u[:, 1:] - problem_system_1.exact_test_solution(u[:, :1])))
+    print(f"Parareal: {slices} slices, {iterations} iterations, max error = {error:.2e}")
+
+
 
 if __name__ == "__main__":
     example_simple_equetion_scalar_ode()
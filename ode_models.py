@@ -1,8 +1,37 @@
-import autograd.numpy as np
+import numpy
 from dataclasses import dataclass
 from typing import Callable, Union
 
 
+class ArrayBackend:
+    """
+    The numpy namespace of the right-hand sides, plain numpy until a solver selects another one with
+    use(module): the autograd Jacobian providers select autograd.numpy, so f stays differentiable.
+    Runs without an autograd Jacobian never import autograd.
+    """
+
+    def __init__(self, module=numpy):
+        self.use(module)
+
+    def use(self, module):
+        """Selects the namespace module, the lookups cached from the previous one are dropped."""
+        if self.__dict__.get("module") is module:
+            return
+        self.__dict__.clear()
+        self.module = module
+
+    def __getattr__(self, name):
+        if name == "module":  # before __init__ (copy, pickle)
+            raise AttributeError(name)
+        value = getattr(self.module, name)
+        setattr(self, name, value)  # later lookups skip __getattr__
+        return value
+
+
+array_backend = ArrayBackend()
+np = array_backend
+
+
 """
 ODE:
 u' = f(u, t)
@@ -16,6 +45,12 @@ class ODEModel:
     T: np.array  # because we made general solve methods for arbitrary dimentions, then end point may be in 3-dim T = (6, 1, 0)
     y0: np.array  # value in t0 point, also for arbitrary dimentions
     number_of_points_to_discretization: int = 250
+    params: Union[np.array, None] = None  # parameter vector p, when given f is called as f(t, u, p)
+    vectorized: bool = False  # True when f broadcasts over leading axes: u.shape = (..., m), t.shape = (..., 1) or scalar
+    jac: Union[Callable[[np.array, np.array], np.array], None] = None  # analytic Jacobian df/du(t, u), dense or scipy.sparse (of f_implicit for a split f)
+    jac_sparsity: Union[np.array, Callable, None] = None  # m x m sparsity pattern of df/du (array, scipy.sparse or a function returning it), enables sparse linear algebra
+    f_implicit: Union[Callable[[np.array, np.array], np.array], None] = None  # split f = f_implicit + f_explicit, the stiff part
+    f_explicit: Union[Callable[[np.array, np.array], np.array], None] = None  # the non-stiff part, see IMEXRungeKutta
 
 
 #####################################################################################################################################
@@ -23,10 +58,11 @@ class ODEModel:
 
 problem_scalar_1 = ODEModel(
     f = lambda t, y: -5. * y + t, 
-    exact_test_solution = lambda t: np.exp(- 5. * t) + t / 5, 
+    exact_test_solution = lambda t: 26 / 25 * np.exp(- 5. * t) + t / 5 - 1 / 25, 
     t0 = np.array([0]), 
     T = np.array([3]), 
-    y0 = np.array([1])
+    y0 = np.array([1]),
+    vectorized = True
 )
 
 
@@ -35,7 +71,8 @@ problem_scalar_2 = ODEModel(
     exact_test_solution = lambda t: np.exp(- 5. * t), 
     t0 = np.array([0]), 
     T = np.array([3]), 
-    y0 = np.array([1])
+    y0 = np.array([1]),
+    vectorized = True
 )
 
 
@@ -46,14 +83,16 @@ problem_nonatonomous_1 = ODEModel(
     exact_test_solution = lambda t: np.exp(t - t ** 2), 
     t0 = np.array([0.]), 
     T = np.array([2.]), 
-    y0 = np.array([1.])
+    y0 = np.array([1.]),
+    vectorized = True
 )
 problem_nonatonomous_2 = ODEModel(
     f = lambda t, y: (y + 1) * (5 - 7 * t**2), 
-    exact_test_solution = lambda t: 3.8 * np.exp(5 * t - 7 * t**3 / 3) - 1, 
+    exact_test_solution = lambda t: 4 * np.exp(5 * t - 7 * t**3 / 3) - 1, 
     t0 = np.array([0.]), 
     T = np.array([2.]), 
-    y0 = np.array([3.])
+    y0 = np.array([3.]),
+    vectorized = True
 )
 
 
@@ -64,7 +103,8 @@ problem_nonlinear_1 = ODEModel(
     exact_test_solution = lambda t: 3 * np.exp(t) / 2 - np.sin(t) / 2 - np.cos(t) / 2 ,  
     t0 = np.array([0]), 
     T = np.array([3]), 
-    y0 = np.array([1])
+    y0 = np.array([1]),
+    vectorized = True
 )
 
 
@@ -73,5 +113,82 @@ problem_nonlinear_2 = ODEModel(
     exact_test_solution = lambda t: np.log(np.exp(2 * t) / 2. + np.exp(4) / 2), 
     t0 = np.array([2.]), 
     T = np.array([5.]), 
-    y0 = np.array([4.])
-)
\ No newline at end of file
+    y0 = np.array([4.]),
+    vectorized = True
+)
+
+
+#=====================
+# 4)  System of ODEs
+problem_system_1 = ODEModel(  # harmonic oscillator u'' = -u written as a first order system
+    f = lambda t, y: np.stack([y[..., 1], -y[..., 0]], axis=-1),
+    exact_test_solution = lambda t: np.hstack([np.cos(t), -np.sin(t)]),
+    t0 = np.array([0.]),
+    T = np.array([10.]),
+    y0 = np.array([1., 0.]),
+    vectorized = True
+)
+
+
+#=====================
+# 4b)  Split stiff / non-stiff (Prothero-Robinson type), y = cos(t)
+imex_1_f_implicit = lambda t, y: -1000. * (y - np.cos(t))  # stiff linear relaxation
+imex_1_f_explicit = lambda t, y: y ** 2 - np.cos(t) ** 2 - np.sin(t)  # cheap, non-stiff and nonlinear
+problem_imex_1 = ODEModel(
+    f = lambda t, y: imex_1_f_implicit(t, y) + imex_1_f_explicit(t, y),
+    exact_test_solution = lambda t: np.cos(t),
+    t0 = np.array([0.]),
+    T = np.array([5.]),
+    y0 = np.array([1.]),
+    number_of_points_to_discretization = 100,
+    vectorized = True,
+    f_implicit = imex_1_f_implicit,
+    f_explicit = imex_1_f_explicit
+)
+
+
+#=====================
+# 5)  Method of lines
+def heat_equation_rhs(t, u, dx):
+    """u_t = u_xx on (0, 1) with u(0) = u(1) = 0, second order central differences."""
+    zero = np.zeros_like(u[..., :1])
+    u_left = np.concatenate((zero, u[..., :-1]), axis=-1)
+    u_right = np.concatenate((u[..., 1:], zero), axis=-1)
+    return (u_left - 2 * u + u_right) / dx ** 2
+
+
+heat_equation_points = 2000
+heat_equation_x = np.linspace(0, 1, heat_equation_points + 2)[1:-1]
+heat_equation_dx = 1 / (heat_equation_points + 1)
+
+
+def heat_equation_sparsity():
+    """Tridiagonal pattern, built on first use so that scipy is only imported by the implicit solvers."""
+    from scipy import sparse
+    return sparse.diags([1, 1, 1], [-1, 0, 1], shape=(heat_equation_points, heat_equation_points), dtype=float)
+
+
+problem_heat_equation = ODEModel(  # stiff, the Jacobian is tridiagonal
+    f = lambda t, y: heat_equation_rhs(t, y, heat_equation_dx),
+    exact_test_solution = lambda t: np.exp(- np.pi ** 2 * t) * np.sin(np.pi * heat_equation_x),
+    t0 = np.array([0.]),
+    T = np.array([0.1]),
+    y0 = np.sin(np.pi * heat_equation_x),
+    number_of_points_to_discretization = 50,
+    vectorized = True,
+    jac_sparsity = heat_equation_sparsity
+)
+
+
+# all problems by name (used by the benchmark and the parallel drivers)
+ODE_PROBLEMS = {
+    "problem_scalar_1": problem_scalar_1,
+    "problem_scalar_2": problem_scalar_2,
+    "problem_nonatonomous_1": problem_nonatonomous_1,
+    "problem_nonatonomous_2": problem_nonatonomous_2,
+    "problem_nonlinear_1": problem_nonlinear_1,
+    "problem_nonlinear_2": problem_nonlinear_2,
+    "problem_system_1": problem_system_1,
+    "problem_imex_1": problem_imex_1,
+    "problem_heat_equation": problem_heat_equation,
+}
@@ -1,5 +1,36 @@
 from .ode_solver import ODESolver
 from .explicit_runge_kutta import ExplicitRungeKutta
-from .implicit_runge_kutta import ImplicitRungeKutta
-from .diagonally_implicit_runge_kutta import DiagonallyImplicitRungeKutta
 
+from .dense_output import DenseOutput
+from .generated_steppers import GeneratedStepper, get_stepper
+from .statistics import SolverStatistics
+from .solution_storage import SolutionStorage, ArrayStorage, MemmapStorage
+
+# the implicit solvers need scipy (and autograd for the autograd Jacobians), they are imported on first use:
+lazy_imports = {
+    "ImplicitRungeKutta": ".implicit_runge_kutta",
+    "DiagonallyImplicitRungeKutta": ".diagonally_implicit_runge_kutta",
+    "AutoSwitchingRungeKutta": ".auto_switching_runge_kutta",
+    "IMEXRungeKutta": ".imex_runge_kutta",
+    "RosenbrockMethod": ".rosenbrock",
+    "JacobianProvider": ".jacobian_providers",
+    "AutogradJacobian": ".jacobian_providers",
+    "AnalyticJacobian": ".jacobian_providers",
+    "FiniteDifferenceJacobian": ".jacobian_providers",
+    "AutogradJacobianVectorProduct": ".jacobian_providers",
+    "FiniteDifferenceJacobianVectorProduct": ".jacobian_providers",
+    "sparse_lu_preconditioner": ".newton_krylov",
+}
+
+
+def __getattr__(name):
+    if name not in lazy_imports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(lazy_imports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(lazy_imports))
@@ -0,0 +1,99 @@
+# implementation of an automatic stiffness switching solver (in the style of LSODA)
+
+import numpy as np
+from scipy import sparse
+
+from .ode_solver import ODESolver
+from .explicit_runge_kutta import ExplicitRungeKutta
+from .diagonally_implicit_runge_kutta import DiagonallyImplicitRungeKutta
+from .newton_krylov import JacobianOperator
+from ode_models import ODEModel
+from butcher_tables import ButcherTableau, get_tableau
+
+
+class AutoSwitchingRungeKutta(ODESolver):
+    """
+    Switches between an explicit and an SDIRK table during the integration. Every
+    stiffness_check_interval steps the spectral radius rho of df/dy is estimated, the explicit
+    table is stable for h * rho <= real_stability_interval of the table. The SDIRK table is
+    used when the step size h is limited by the stability of the explicit table, the explicit
+    table again when h * rho falls below nonstiff_fraction of that limit (where explicit
+    stages are cheaper than Newton iterations).
+    """
+
+    stiffness_check_interval = 10  # steps between spectral radius estimates
+    stiff_fraction = 0.9  # stiff when h * rho exceeds this fraction of the explicit stability interval
+    nonstiff_fraction = 0.5  # non-stiff again below this fraction
+    profiled_phases = {}  # the phases are timed by the explicit and the implicit solver
+
+    def __init__(
+        self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float,
+        implicit_tableau: ButcherTableau = None, jacobian_provider=None, **kwargs
+    ):
+        super().__init__(ode_problem, A, b, c, tolerance, **kwargs)
+        if not self.tableau.is_explicit:
+            raise ValueError(f"The Butcher table {self.tableau.name} is not explicit.")
+        implicit_tableau = get_tableau("DIRKFourOrderEmbedded") if implicit_tableau is None else implicit_tableau
+        if self.adaptive and not implicit_tableau.is_embedded:
+            raise ValueError(f"Adaptive step-size control needs an embedded Butcher pair, {implicit_tableau.name} is not.")
+
+        # the two solvers share the statistics, their step size is set before every step:
+        options = dict(
+            y0=self.y0, params=self.params, stats=self.stats, profile=kwargs.get("profile", False),
+            rtol=kwargs.get("rtol"), atol=kwargs.get("atol")
+        )
+        self.explicit = ExplicitRungeKutta.from_tableau(ode_problem, self.tableau, tolerance, **options)
+        self.implicit = DiagonallyImplicitRungeKutta.from_tableau(
+            ode_problem, implicit_tableau, tolerance, jacobian_provider=jacobian_provider, **options
+        )
+        self.stability_limit = self.tableau.real_stability_interval
+        self.active = None
+        self.steps_since_check = self.stiffness_check_interval
+        self.spectral_radius = None  # last estimate
+        self.switches = []  # (t, name of the table) at every change of the active table
+        self.activate(self.explicit, self.t[0])
+
+    def activate(self, solver: ODESolver, t):
+        """Makes the table of solver the one of this solver (b, b_hat, ... are used by the step loops)."""
+        if solver is self.active:
+            return
+        self.active = solver
+        self.b = solver.b
+        self.b_hat = solver.b_hat
+        self.embedded_order = solver.embedded_order  # exponent of the step-size controller
+        self.c = solver.c
+        self.first_stage_explicit = solver.first_stage_explicit
+        self.switches.append((float(np.squeeze(t)), solver.tableau.name))
+
+    def stage_derivatives(self, current_time, current_y):
+        """The stage derivatives of one step by the active table, checks the stiffness first when it is due."""
+        self.steps_since_check += 1
+        if self.steps_since_check >= self.stiffness_check_interval:
+            self.check_stiffness(current_time, current_y)
+        self.active.h = self.h
+        return self.active.stage_derivatives(current_time, current_y)
+
+    def check_stiffness(self, t, y):
+        """
+        Estimates rho(df/dy) in (t, y) and switches the active table. The Jacobian is evaluated by the
+        implicit solver, so it starts from a fresh Jacobian after a switch.
+        """
+        self.steps_since_check = 0
+        self.spectral_radius = self.estimate_spectral_radius(self.implicit.current_jacobian(t, y, refresh=True))
+        stiffness = float(np.abs(np.squeeze(self.h))) * self.spectral_radius / self.stability_limit
+        if self.active is self.explicit and stiffness > self.stiff_fraction:
+            self.activate(self.implicit, t)
+        elif self.active is self.implicit and stiffness < self.nonstiff_fraction:
+            self.activate(self.explicit, t)
+
+    def estimate_spectral_radius(self, J):
+        """
+        max |lambda(J)| over the ensemble, the Gershgorin bound (max absolute row sum) for a sparse J,
+        a power iteration (O(m^2) per product for a dense J, no eigenvalue decomposition) otherwise.
+        """
+        if sparse.issparse(J):
+            return float(abs(J).sum(axis=1).max())
+        if isinstance(J, JacobianOperator):
+            return float(J.spectral_radius())
+        operator = JacobianOperator(None, self.implicit.y0, lambda v: np.einsum("...ij,...j->...i", J, v))
+        return float(operator.spectral_radius())
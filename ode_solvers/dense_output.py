@@ -0,0 +1,52 @@
+import numpy as np
+
+
+class DenseOutput:
+    """
+    Continuous solution by piecewise cubic Hermite interpolation between the solution points:
+    y(t_n + theta*h) = h00*y_n + h10*h*y'_n + h01*y_{n+1} + h11*h*y'_{n+1}, 0 <= theta <= 1
+    where y'_n = f(t_n, y_n). The interpolant is C^1 and third order accurate.
+    """
+
+    def __init__(self):
+        self.t = []
+        self.y = []
+        self.dydt = []
+
+    def append(self, t, y, dydt):
+        """Stores one solution point (copies, the solver may reuse its arrays)."""
+        self.t.append(float(np.squeeze(t)))
+        self.y.append(np.array(y, dtype=float))
+        self.dydt.append(np.array(dydt, dtype=float))
+
+    def __len__(self):
+        return len(self.t)
+
+    def __call__(self, t):
+        """
+        Parameters:
+        -------------
+        t = float or 1 x k vector of times in [t_0, T]
+        Returns:
+        -------------
+        m vector (k x m for a vector of times, with the batch axis for an ensemble)
+        """
+        times = np.asarray(self.t)
+        y = np.asarray(self.y)
+        dydt = np.asarray(self.dydt)
+        t = np.asarray(t, dtype=float)
+        scalar = t.ndim == 0
+        t = np.atleast_1d(t).ravel()
+
+        n = np.clip(np.searchsorted(times, t, side='right') - 1, 0, len(times) - 2)
+        h = times[n + 1] - times[n]
+        theta = (t - times[n]) / h
+        shape = (len(t),) + (1,) * (y.ndim - 1)  # broadcast over the state (and batch) axes
+        theta, h = theta.reshape(shape), h.reshape(shape)
+
+        h00 = 2 * theta**3 - 3 * theta**2 + 1
+        h10 = theta**3 - 2 * theta**2 + theta
+        h01 = -2 * theta**3 + 3 * theta**2
+        h11 = theta**3 - theta**2
+        values = h00 * y[n] + h10 * h * dydt[n] + h01 * y[n + 1] + h11 * h * dydt[n + 1]
+        return values[0] if scalar else values
@@ -1,8 +1,6 @@
 # implementation of Singly Diagonally Implicit Runge–Kutta Method(SDIRK)
 
-import autograd.numpy as np
-from autograd import grad, jacobian
-from scipy import linalg
+import numpy as np
 
 from .implicit_runge_kutta import ImplicitRungeKutta
 from ode_models import ODEModel
@@ -10,63 +8,109 @@ from ode_models import ODEModel
 
 class DiagonallyImplicitRungeKutta(ImplicitRungeKutta):
 
-    def __init__(self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float):
-        super().__init__(ode_problem, A, b, c, tolerance)
+    structures = ("SDIRK",)  # allowed structures of the Butcher table
 
-    def phi_solve(self, current_time, current_y, init_val, J, M):
-        """
-        This function solves F(Y_i)=0 by solving s systems of size m 
-            x m each.
-        Newton’s method is used with an initial guess init_val.
+    def __init__(self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float, **kwargs):
+        super().__init__(ode_problem, A, b, c, tolerance, **kwargs)
+        if self.tableau.structure not in self.structures:
+            raise ValueError(f"The Butcher table {self.tableau.name} is not singly diagonally implicit.")
+        self.gamma = self.A[-1, -1]  # a_ii, the same for all stages
+        self.eigen_blocks = None  # the stages are solved one after another with I - h*a_ii*J
+        self.stage_predictor = None  # last stage derivative of the previous step
 
+    def stage_derivatives(self, t0, y0):
+        """
+        Calculates the stage derivatives Y'_j of one step stage by stage, every stage is an m x m
+        Newton iteration of its own (see phi_solve).
         Parameters:
         -------------
         t0 = float, current timestep
-        y0 = 1 x m vector, the last solution y_n. Where m is the length of the initial condition y_0 of the IVP.
-        init_val = initial guess for the Newton iteration
+        y0 = 1 x m vector (batch_shape x m), the last solution y_n
+        Returns:
+        -------------
+        s x m (batch_shape x s x m) array of stage derivatives
+        """
+        M = 1000  # max number of newton iterations per stage
+        iterations = self.stats.newton_iterations
+
+        J = self.current_jacobian(t0, y0)
+        stage_der = self.phi_solve(t0, y0, J, M)
+        if stage_der is None:  # Newton contraction degraded with the reused Jacobian
+            J = self.current_jacobian(t0, y0, refresh=True)
+            stage_der = self.phi_solve(t0, y0, J, M)
+        self.stats.record_newton_step(self.stats.newton_iterations - iterations)
+
+        self.stage_predictor = stage_der[..., -1, :]
+        return stage_der
+
+    def phi_solve(self, current_time, current_y, J, M):
+        """
+        This function solves F(Y_i)=0 by solving s systems of size m x m one after another,
+        the i:th stage only depends on the stages j < i that are already converged.
+        Newton’s method is used for every stage, the first stage starts from the last stage derivative
+        of the previous step (f(t_n, y_n) for a stiffly accurate table), stage i from stage i - 1.
+
+        Parameters:
+        -------------
+        current_time = float, current timestep
+        current_y = 1 x m vector, the last solution y_n. Where m is the length of the initial condition y_0 of the IVP.
         J = m x m matrix, the Jacobian matrix of f() evaluated in y_i
-        M = maximal number of Newton iterations
+        M = maximal number of Newton iterations per stage
 
         Returns:
         -------------
-        The stage derivative Y’_i
+        The stage derivatives Y’, None when the contraction of a reused Jacobian is too slow
         """
-        JJ = np.eye(self.num_init_conditions) - self.h * self.A[0,0] * J
-        lu_factor = linalg.lu_factor(JJ)
-        for i in range(M):
-            init_val, norm_d = self.phi_newtonstep(current_time, current_y, init_val, J, lu_factor)
-            if norm_d < self.tol:
-                break
-            elif i == M - 1:
-                raise ValueError("The Newton iteration did noconverge.")
-        return init_val
+        lu_factor = self.factorize(J)
+        stage_der = np.empty(self.batch_shape + (self.s, self.num_init_conditions))
+        if self.stage_predictor is None:
+            self.stage_predictor = self.f(current_time, current_y)
+        predictor = self.stage_predictor
+        for i in range(self.s):
+            explicit_part = current_y + self.h * (self.A[i, :i] @ stage_der[..., :i, :])  # y_n + h*sum_{j<i} a_{ij}*Y’_j
+            stage_time = current_time + self.c[i] * self.h
+            predictor = self.phi_newtonstep(stage_time, explicit_part, self.A[i, i], predictor, lu_factor, M)
+            if predictor is None:
+                return None
+            stage_der[..., i, :] = predictor
+        return stage_der
 
-    
+    def newton_matrix(self, J):
+        """The m x m matrix I - h * a_ii * J, shared by all stages (SDIRK)."""
+        return self.identity_minus(self.h * self.gamma, J)
 
-    def phi_newtonstep(self, current_time, current_y, init_val, J, lu_factor):
+    def phi_newtonstep(self, stage_time, explicit_part, a_ii, init_val, lu_factor, M):
         """
-        Takes one Newton step by solvning
-        G’(Y_i)(Y^(n+1)_i-Y^(n)_i)=-G(Y_i)
-        where G(Y_i) = Y_i - haY’_i - y_n - h*sum(a_{ij}*Y’_j) for j=1,...,i-1
+        Newton iteration of one stage, solves
+        G’(Y’_i)(Y’^(n+1)_i-Y’^(n)_i)=-G(Y’_i)
+        where G(Y’_i) = Y’_i - f(t_n + c_i*h, y_n + h*sum(a_{ij}*Y’_j) + h*a_ii*Y’_i) for j=1,...,i-1
+        and G’ = I - h*a_ii*J, one f evaluation per iteration.
 
         Parameters:
         -------------
-        t0 = float, current timestep
-        y0 = 1 x m vector, the last solution y_n. Where m is the length of the initial condition y_0 of the IVP.
-        init_val = initial guess for the Newton iteration
+        stage_time = float, t_n + c_i*h
+        explicit_part = 1 x m vector, y_n + h*sum(a_{ij}*Y’_j) for j=1,...,i-1
+        a_ii = diagonal element of the Butcher matrix
+        init_val = initial guess (predictor) for the stage derivative
         lu_factor = (lu, piv) see documentation for linalg.lu_factor
+        M = maximal number of Newton iterations
 
         Returns:
-        The difference Y^(n+1)_i-Y^(n)_i
+        The stage derivative Y’_i, None when the contraction of a reused Jacobian is too slow
         """
-        x = []
-        for i in range(self.s):  # solving the s mxm systems
-            rhs = -self.F(
-                init_val.flatten(), current_time, current_y
-            )[i * self.num_init_conditions : (i + 1) * self.num_init_conditions] + np.sum(
-                [self.h * self.A[i,j] * J @ x[j] for j in range(i)],
-                axis = 0
-            )
-            d = linalg.lu_solve(lu_factor, rhs)
-            x.append(d)
-        return init_val + x, linalg.norm(x)
+        norm_prev = None
+        for i in range(M):
+            self.stats.newton_iterations += 1
+            residual = init_val - self.f(stage_time, explicit_part + self.h * a_ii * init_val)
+            d = self.lu_solve(lu_factor, -residual)
+            init_val = init_val + d
+            norm_d = np.max(np.linalg.norm(d, axis=-1))
+            if norm_d < self.tol:
+                return init_val
+            elif i == M - 1:
+                self.stats.convergence_failures += 1
+                raise ValueError("The Newton iteration did not converge.")
+            elif self.is_contraction_degraded(norm_d, norm_prev):
+                self.stats.convergence_failures += 1
+                return None
+            norm_prev = norm_d
@@ -1,25 +1,67 @@
-import autograd.numpy as np
-from autograd import grad, jacobian
-from scipy import linalg
+import numpy as np
 
 from .ode_solver import ODESolver
+from .generated_steppers import get_stepper, jit_rhs
 from ode_models import ODEModel
 
 
 class ExplicitRungeKutta(ODESolver):
 
-    def __init__(self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float):
-        super().__init__(ode_problem, A, b, c, tolerance)
+    def __init__(
+        self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float,
+        generated: bool = False, jit: bool = False, **kwargs
+    ):
+        super().__init__(ode_problem, A, b, c, tolerance, **kwargs)
+        if not self.tableau.is_explicit:
+            raise ValueError(f"The Butcher table {self.tableau.name} is not explicit.")
         self.h = self.t[1] - self.t[0]
-        
+
+        # preallocated buffers, reused on every step:
+        shape = self.batch_shape + (self.num_init_conditions,)  # leading batch axis for an ensemble
+        self.K = np.zeros(self.batch_shape + (self.s, self.num_init_conditions))  # stage derivatives, the i:th stage is on the i:th row
+        self.stage_y = np.zeros(shape)  # input of the current stage
+        self.increment = np.zeros(shape)  # sum_{j=1}^{s} b_{j}*K_j
+
+        # stage-unrolled stepper generated for the table (see generated_steppers), compiled by numba
+        # with jit=True when numba is installed and f compiles, the plain Python stepper otherwise:
+        self.stepper = None
+        self.stepper_f = self.f  # the numba compiled f is not counted by itself
+        if generated or jit:
+            self.stepper = get_stepper(self.tableau, jit)
+        if self.stepper is not None and self.stepper.jit:
+            plain_f = self.params is None and (not self.batch_shape or ode_problem.vectorized)
+            self.stepper_f = jit_rhs(ode_problem.f, self.stepper, self.t[0], self.y0, self.h) if plain_f else None
+            if self.stepper_f is None:
+                self.stepper, self.stepper_f = get_stepper(self.tableau), self.f
+
+    def stage_derivatives(self, current_time, current_y):
+        """
+        Computes the stage derivatives K_i = f(t_n + c_i*h, y_n + h*sum_{j<i} a_{ij}*K_j) into the s x m
+        buffer self.K (batch_shape x s x m for an ensemble, all trajectories advance together).
+        Every stage input is one matrix-vector product of the i:th row of A with the already
+        computed stages, current_y is never modified.
+        Parameters:
+        -------------
+        current_time = float, current timestep
+        current_y = 1 x m vector (batch_shape x m), the last solution y_n
+        Returns:
+        -------------
+        s x m (batch_shape x s x m) array of stage derivatives (the buffer self.K, overwritten by the next call)
+        """
+        if self.stepper is not None:
+            if self.stepper.jit:
+                self.stats.f_evaluations += self.s
+            return self.stepper.stages(self.stepper_f, current_time, current_y, self.h, self.K)
+        for i in range(self.s):
+            np.dot(self.A[i, :i], self.K[..., :i, :], out=self.stage_y)
+            self.stage_y *= self.h
+            self.stage_y += current_y
+            self.K[..., i, :] = self.f(current_time + self.c[i] * self.h, self.stage_y)
+        return self.K
+
     def phi(self, current_time, current_y):
-        K = np.zeros(self.s, dtype=float)
-        for s in range(self.s):
-            t = current_time + self.c[s] * self.h
-            y = current_y
-            for j in range(s):
-                y += self.A[s, j] * K[j] * self.h
-            K[s] = self.f(t, y)
-        
-        return self.h * K.T @ self.b
-        
\ No newline at end of file
+        if self.stepper is not None and not self.dense_output:  # dense output needs the stages in self.K
+            if self.stepper.jit:
+                self.stats.f_evaluations += self.stepper.phi_evaluations
+            return self.stepper.phi(self.stepper_f, current_time, current_y, self.h)
+        return np.dot(self.b, self.stage_derivatives(current_time, current_y), out=self.increment)
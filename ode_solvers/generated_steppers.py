@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import Callable
+
+from butcher_tables import ButcherTableau
+
+
+@dataclass(frozen=True)
+class GeneratedStepper:
+    """
+    Stage-unrolled step functions of one explicit Butcher table:
+    phi(f, t, y, h) = sum_{j=1}^{s} b_j*K_j, the increment of y_{n+1} = y_n + h * phi
+    stages(f, t, y, h, K) fills the s x m buffer K (batch_shape x s x m) with the stage derivatives and returns it
+    The coefficients are folded into the source as literals, zero entries of A and b are left out,
+    phi also leaves out the stages that do not reach the increment (see live_stages).
+    """
+    name: str
+    source: str
+    phi: Callable
+    stages: Callable
+    jit: bool  # compiled by numba
+    phi_evaluations: int  # f evaluations of one phi call
+
+
+stepper_cache = {}
+
+
+def load_numba():
+    """numba, imported on the first jit request (it is optional and slow to import), None when it is not installed."""
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba
+
+
+def linear_combination(coefficients, terms):
+    """Source of sum_j coefficients[j] * terms[j] without the zero coefficients, None when all are zero."""
+    source = ""
+    for coefficient, term in zip(coefficients, terms):
+        if coefficient == 0:
+            continue
+        sign = "-" if coefficient < 0 else "+"
+        product = term if abs(coefficient) == 1 else f"{float(abs(coefficient))!r} * {term}"
+        source = f"{sign}{product}" if not source else f"{source} {sign} {product}"
+    if not source:
+        return None
+    return source[1:] if source[0] == "+" else source
+
+
+def live_stages(tableau: ButcherTableau):
+    """
+    Indices of the stages phi needs: b_j != 0, or a_{ij} != 0 for a later needed stage i.
+    The others only serve the embedded estimate or the next step (FSAL), e.g. the last
+    stage of DormandPrinceMethod and BogackiShampineMethod.
+    """
+    live = set()
+    for i in reversed(range(tableau.s)):
+        if tableau.b[i] != 0 or any(tableau.A[j, i] != 0 for j in live):
+            live.add(i)
+    return sorted(live)
+
+
+def stepper_source(tableau: ButcherTableau):
+    """Python source of the functions phi and stages of an explicit table."""
+    k = [f"k{i}" for i in range(tableau.s)]
+    lines = []
+    for i in range(tableau.s):
+        time = f"t + {linear_combination([tableau.c[i]], ['h'])}" if tableau.c[i] != 0 else "t"
+        increment = linear_combination(tableau.A[i, :i], k[:i])
+        stage = "y" if increment is None else f"y + h * ({increment})"
+        lines.append(f"    {k[i]} = f({time}, {stage})")
+    phi_lines = [lines[i] for i in live_stages(tableau)]
+    increment = linear_combination(tableau.b, k) or "0. * y"
+    store = [f"    K[..., {i}, :] = {k[i]}" for i in range(tableau.s)]
+    return "\n".join(
+        ["def phi(f, t, y, h):"] + phi_lines + [f"    return {increment}", "", "", "def stages(f, t, y, h, K):"]
+        + lines + store + ["    return K", ""]
+    )
+
+
+def get_stepper(tableau: ButcherTableau, jit: bool = False) -> GeneratedStepper:
+    """
+    The cached generated stepper of an explicit table. With jit=True the functions are compiled
+    by numba when it is installed (they then need a numba compiled f, see jit_rhs).
+    """
+    if not tableau.is_explicit:
+        raise ValueError(f"The Butcher table {tableau.name} is not explicit.")
+    numba = load_numba() if jit else None
+    jit = numba is not None
+    key = (tableau.A.tobytes(), tableau.b.tobytes(), tableau.c.tobytes(), jit)
+    if key not in stepper_cache:
+        source = stepper_source(tableau)
+        namespace = {}
+        exec(compile(source, f"<stepper {tableau.name}>", "exec"), namespace)
+        phi, stages = namespace["phi"], namespace["stages"]
+        if jit:
+            phi, stages = numba.njit(phi), numba.njit(stages)
+        stepper_cache[key] = GeneratedStepper(tableau.name, source, phi, stages, jit, len(live_stages(tableau)))
+    return stepper_cache[key]
+
+
+def jit_rhs(f: Callable, stepper: GeneratedStepper, t, y, h):
+    """
+    numba compiled f for a compiled stepper, None when f cannot be compiled (e.g. it uses
+    autograd.numpy or bound parameters), then the plain Python stepper has to be used.
+    """
+    try:
+        f_jit = load_numba().njit(f)
+        stepper.phi(f_jit, t, y, h)  # compiles both for these argument types
+        return f_jit
+    except Exception:
+        return None
@@ -0,0 +1,98 @@
+# implementation of additive (implicit-explicit, IMEX) Runge–Kutta methods
+
+import dataclasses
+from typing import Callable, Union
+
+import numpy as np
+
+from .diagonally_implicit_runge_kutta import DiagonallyImplicitRungeKutta
+from ode_models import ODEModel
+from butcher_tables import ButcherTableau, get_imex_tableaux
+
+
+class IMEXRungeKutta(DiagonallyImplicitRungeKutta):
+    """
+    Additive Runge–Kutta method for a split right-hand side f = f_implicit + f_explicit
+    (ODEModel.f_implicit, ODEModel.f_explicit). With the explicit table (A^E, b^E) and the
+    DIRK table (A^I, b^I) on the same nodes c, the stage values are
+    Y_i = y_n + h*sum_{j<i} a^E_{ij}*f_explicit(Y_j) + h*sum_{j<=i} a^I_{ij}*f_implicit(Y_j)
+    and y_{n+1} = y_n + h*sum_j (b^E_j*f_explicit(Y_j) + b^I_j*f_implicit(Y_j)).
+    Only f_implicit enters the Newton iterations and the Jacobian, every stage is an m x m system
+    with the same matrix I - h*gamma*J_implicit.
+    """
+
+    structures = ("SDIRK", "DIRK")
+
+    def __init__(
+        self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float,
+        explicit_tableau: ButcherTableau = None, **kwargs
+    ):
+        if ode_problem.f_implicit is None or ode_problem.f_explicit is None:
+            raise ValueError("The IMEX solver needs a split right-hand side (f_implicit and f_explicit).")
+        # the implicit solver machinery (Jacobian, LU, Newton) only sees f_implicit:
+        super().__init__(dataclasses.replace(ode_problem, f=ode_problem.f_implicit), A, b, c, tolerance, **kwargs)
+        diagonal = np.diag(self.A)
+        if np.any((diagonal != 0) & (diagonal != self.gamma)):
+            raise ValueError(f"The Butcher table {self.tableau.name} has more than one nonzero diagonal element.")
+        if explicit_tableau is None or not explicit_tableau.is_explicit or explicit_tableau.s != self.s:
+            raise ValueError("The IMEX solver needs an explicit table with as many stages as the implicit one.")
+        if not np.allclose(explicit_tableau.c, self.c):
+            raise ValueError("The explicit and the implicit table of an IMEX pair need the same nodes c.")
+        self.explicit_tableau = explicit_tableau
+        self.A_explicit = explicit_tableau.A
+
+        self.f_explicit = self.counted(self.build_rhs(dataclasses.replace(ode_problem, f=ode_problem.f_explicit), self.params))
+        if kwargs.get("profile"):
+            self.f_explicit = self.stats.timed("f", self.f_explicit)
+        self.f_stages = None  # the stages are solved one after another
+
+        # the stage derivatives of a step are stacked [f_explicit(Y_j); f_implicit(Y_j)], phi = b @ K:
+        self.b = np.concatenate((explicit_tableau.b, self.tableau.b))
+        self.first_stage_explicit = False
+
+    @classmethod
+    def from_pair(cls, ode_problem: ODEModel, method: Union[Callable, str], tolerance: float, **kwargs):
+        """Solver for an IMEX pair of butcher_tables.IMEX_TABLES."""
+        explicit_tableau, implicit_tableau = get_imex_tableaux(method)
+        return cls.from_tableau(ode_problem, implicit_tableau, tolerance, explicit_tableau=explicit_tableau, **kwargs)
+
+    def point_derivative(self, t, y, last_point=False):
+        return self.f(t, y) + self.f_explicit(t, y)
+
+    def phi_solve(self, current_time, current_y, J, M):
+        """
+        Solves the stages one after another, Newton’s method only on the implicit part of the
+        stages with a_ii != 0, the explicit part is evaluated once per stage.
+
+        Parameters:
+        -------------
+        current_time = float, current timestep
+        current_y = 1 x m vector, the last solution y_n. Where m is the length of the initial condition y_0 of the IVP.
+        J = m x m matrix, the Jacobian matrix of f_implicit() evaluated in y_i
+        M = maximal number of Newton iterations per stage
+
+        Returns:
+        -------------
+        2s x m array (batch_shape x 2s x m): f_explicit(Y_j) on the first s rows, f_implicit(Y_j) on the last s rows,
+        None when the contraction of a reused Jacobian is too slow
+        """
+        lu_factor = self.factorize(J)
+        stage_der = np.empty(self.batch_shape + (2 * self.s, self.num_init_conditions))
+        explicit_der, implicit_der = stage_der[..., :self.s, :], stage_der[..., self.s:, :]
+        if self.stage_predictor is None:
+            self.stage_predictor = self.f(current_time, current_y)
+        predictor = self.stage_predictor
+        for i in range(self.s):
+            explicit_part = current_y + self.h * (
+                self.A_explicit[i, :i] @ explicit_der[..., :i, :] + self.A[i, :i] @ implicit_der[..., :i, :]
+            )
+            stage_time = current_time + self.c[i] * self.h
+            if self.A[i, i] == 0:
+                predictor = self.f(stage_time, explicit_part)
+            else:
+                predictor = self.phi_newtonstep(stage_time, explicit_part, self.A[i, i], predictor, lu_factor, M)
+                if predictor is None:
+                    return None
+            implicit_der[..., i, :] = predictor
+            explicit_der[..., i, :] = self.f_explicit(stage_time, explicit_part + self.h * self.A[i, i] * predictor)
+        return stage_der
@@ -1,36 +1,218 @@
-import autograd.numpy as np
-from autograd import grad, jacobian
-from scipy import linalg
+import numpy as np
+from typing import Union
+from scipy import linalg, sparse
+from scipy.sparse.linalg import splu, SuperLU
 
 from .ode_solver import ODESolver
+from .jacobian_providers import JacobianProvider, build_jacobian_provider
+from .newton_krylov import JacobianOperator, KrylovSolver, NewtonOperator
 from ode_models import ODEModel
 
 
 class ImplicitRungeKutta(ODESolver):
 
-    def __init__(self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float):
-        super().__init__(ode_problem, A, b, c, tolerance)
+    # simplified Newton: a reused Jacobian is refreshed when ||d_k|| / ||d_{k-1}|| exceeds this rate
+    contraction_limit = 0.5
 
+    # GMRES of the matrix-free (Newton–Krylov) mode: relative residual, absolute residual as a fraction
+    # of the Newton tolerance (the floor of finite difference products), restart length, max restarts
+    krylov_rtol = 1e-4
+    krylov_atol_factor = 0.1
+    krylov_restart = 30
+    krylov_maxiter = 20
 
-    def phi(self, t0, y0):
+    profiled_phases = {
+        "step": "stage_derivatives",
+        "jacobian": "jacobian",
+        "factorization": "factor_newton_matrix",
+        "linear_solve": "lu_solve",
+        "newton": "phi_solve",
+    }
+
+    def __init__(
+        self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float,
+        reuse_jacobian: bool = True, eigen_transform: bool = True,
+        jacobian_provider: Union[str, JacobianProvider] = None, preconditioner=None, **kwargs
+    ):
+        super().__init__(ode_problem, A, b, c, tolerance, **kwargs)
+
+        # analytic, (colored) finite differences, autograd or matrix-free products, see jacobian_providers:
+        self.jacobian_provider = build_jacobian_provider(
+            jacobian_provider, ode_problem, self.f, self.params, self.batch_shape, self.t[0], self.y0
+        )
+        # matrix-free mode: preconditioner(t, y, scale) ~ (I - scale * J(t, y))^-1, see KrylovSolver,
+        # without one GMRES converges slowly on stiff problems (e.g. newton_krylov.sparse_lu_preconditioner)
+        self.preconditioner = preconditioner
+
+        # A = T * diag(lambda) * T^-1, decouples the Newton system into s systems of size m x m
+        # (not in the matrix-free mode, GMRES works on the real sm x sm operator):
+        self.eigen_blocks = self.diagonalize() if eigen_transform and not self.jacobian_provider.matrix_free else None
+
+        # Jacobian and LU factorization kept across steps (simplified Newton):
+        self.reuse_jacobian = reuse_jacobian
+        self.J = None
+        self.jacobian_is_fresh = False  # J was evaluated in the current step
+        self.lu = None
+        self.lu_h = None  # step size the factorization was made with
+
+    def stage_derivatives(self, t0, y0):
         """
-        Calculates the summation of b_j*Y_j in one step of the RungeKutta method with
-        y_{n+1} = y_{n} + h * sum_{j=1}^{s} b_{j}*Y
+        Calculates the stage derivatives Y'_j of one step of the RungeKutta method with
+        y_{n+1} = y_{n} + h * sum_{j=1}^{s} b_{j}*Y'_j
         where j=1,2,...,s, and s is the number of stages, b the nodes, and Y the stage values of the method.
         Parameters:
         -------------
         t0 = float, current timestep
         y0 = 1 x m vector, the last solution y_n. Where m is the length of the initial condition y_0 of the IVP.
+             For an ensemble batch_shape x m, the stages of all trajectories are solved together.
         """
         M = 1000  # max number of newton iterations
+        iterations = self.stats.newton_iterations
 
-        stage_der = np.array(self.s * [self.f(t0, y0)])  # initial value: Y’_0
-        J = jacobian(self.f)(t0, y0)
+        stage_der = np.concatenate(self.s * [self.f(t0, y0)], axis=-1)  # initial value: Y’_0
+        J = self.current_jacobian(t0, y0)
         stage_val = self.phi_solve(t0, y0, stage_der, J, M)
+        if stage_val is None:  # Newton contraction degraded with the reused Jacobian
+            J = self.current_jacobian(t0, y0, refresh=True)
+            stage_val = self.phi_solve(t0, y0, stage_der, J, M)
+        self.stats.record_newton_step(self.stats.newton_iterations - iterations)
+
+        return stage_val.reshape(self.batch_shape + (self.s, self.num_init_conditions))
+
+    def jacobian(self, t0, y0):
+        """
+        Returns m x m matrix (batch_shape x m x m for an ensemble), the Jacobian df/dy evaluated
+        in (t0, y0) by the solver's Jacobian provider, dense or scipy.sparse.
+        """
+        return self.jacobian_provider(t0, y0)
+
+    def current_jacobian(self, t0, y0, refresh=False):
+        """Returns the Jacobian of the previous steps, evaluates a new one only when needed."""
+        if refresh or self.J is None or not self.reuse_jacobian:
+            self.J = self.jacobian(t0, y0)
+            self.stats.jacobian_evaluations += 1
+            self.jacobian_is_fresh = True
+            self.lu = None
+        else:
+            self.stats.jacobian_reuses += 1
+            self.jacobian_is_fresh = False
+        return self.J
+
+    def factorize(self, J):
+        """Returns the LU factorization of the Newton matrix, refactors only when J or h has changed."""
+        if self.lu is None or not np.array_equal(self.lu_h, self.h) or not self.reuse_jacobian:
+            self.lu = self.factor_newton_matrix(J)
+            self.lu_h = self.h
+            self.stats.factorizations += 1
+        else:
+            self.stats.factorization_reuses += 1
+        return self.lu
+
+    def diagonalize(self):
+        """
+        Groups the eigenvalues of the Butcher matrix A (precomputed once per table in the tableau).
+        Returns:
+        -------------
+        list of (lambda_i, i, j): one m x m system I - h*lambda_i*J per real eigenvalue and one complex
+        system per complex-conjugate pair, j is the index of the conjugate partner (None for real lambda_i).
+        None when A is not diagonalizable, then the full sm x sm Kronecker system is used.
+        """
+        if self.tableau.T is None:
+            return None
+        eigenvalues = self.tableau.eigenvalues
+        self.T = self.tableau.T
+        self.T_inv = self.tableau.T_inv
+        blocks = []
+        for i, lam in enumerate(eigenvalues):
+            if np.imag(lam) < 0:
+                continue  # solved together with its conjugate partner
+            if np.imag(lam) == 0:
+                blocks.append((np.real(lam), i, None))
+            else:
+                j = int(np.argmin(np.abs(eigenvalues - np.conj(lam))))
+                blocks.append((lam, i, j))
+        return blocks
+
+    def factor_newton_matrix(self, J):
+        """LU factorization of I - h * kron(A, J), s decoupled m x m factorizations when A is diagonalized."""
+        if self.eigen_blocks is None:
+            return self.lu_factor(self.newton_matrix(J))
+        # lambda = 0 (an explicit stage) leaves the identity, its block is not factorized:
+        return [None if lam == 0 else self.lu_factor(self.identity_minus(self.h * lam, J)) for lam, i, j in self.eigen_blocks]
+
+    def newton_solve(self, lu_factor, rhs):
+        """
+        Solves (I - h * kron(A, J)) d = rhs. In eigen coordinates e = (T^-1 x I) d the system is
+        (I - h * lambda_i * J) e_i = (T^-1 x I) rhs, for a complex-conjugate pair e_j = conj(e_i).
+        """
+        if self.eigen_blocks is None:
+            return self.lu_solve(lu_factor, rhs)
+        r = self.T_inv @ rhs.reshape(self.batch_shape + (self.s, self.num_init_conditions))
+        e = np.empty(r.shape, dtype=complex)
+        for lu, (lam, i, j) in zip(lu_factor, self.eigen_blocks):
+            if lu is None:
+                e[..., i, :] = r[..., i, :]
+            elif j is None:
+                e[..., i, :] = self.lu_solve(lu, np.real(r[..., i, :]))
+            else:
+                e[..., i, :] = self.lu_solve(lu, r[..., i, :])
+                e[..., j, :] = np.conj(e[..., i, :])
+        return np.real(self.T @ e).reshape(rhs.shape)
+
+    def newton_matrix(self, J):
+        """The sm x sm matrix I - h * kron(A, J)."""
+        if isinstance(J, JacobianOperator):
+            return NewtonOperator(J, self.A, self.h)
+        if sparse.issparse(J):
+            return self.identity_minus(self.h, sparse.kron(self.A, J, format='csc'))
+        return np.eye(self.s * self.num_init_conditions) - self.h * self.kron(self.A, J)
+
+    def identity_minus(self, scale, J):
+        """I - scale * J, assembled in scipy.sparse (csc) when J is sparse, a LinearOperator when J is matrix-free."""
+        if isinstance(J, JacobianOperator):
+            return NewtonOperator(J, 1., np.asarray(scale).item())
+        if sparse.issparse(J):
+            return (sparse.identity(J.shape[0], format='csc') - np.asarray(scale).item() * J).tocsc()
+        return np.eye(J.shape[-1]) - scale * J
+
+    def jacobian_vector_product(self, J, x):
+        """J @ x for dense, sparse, batched (batch_shape x m x m) and matrix-free Jacobians."""
+        if isinstance(J, JacobianOperator):
+            return J.apply(x)
+        if not self.batch_shape:
+            return J @ x
+        return np.einsum('...kl,...l->...k', J, x)
 
-        return np.array([
-            self.b @ stage_val.reshape(self.s, self.num_init_conditions)[:,j] for j in range(self.num_init_conditions)
-        ])
+    def kron(self, A, J):
+        """np.kron(A, J) with a leading batch axis in J."""
+        sm = self.s * self.num_init_conditions
+        return (A[:, None, :, None] * J[..., None, :, None, :]).reshape(J.shape[:-2] + (sm, sm))
+
+    def lu_factor(self, matrix):
+        """
+        LU factorization of the Newton matrix: SuperLU for a sparse matrix, batched LAPACK LU solves for an ensemble,
+        a (preconditioned) GMRES solver for a matrix-free operator.
+        """
+        if isinstance(matrix, NewtonOperator):
+            return KrylovSolver(
+                matrix, self.stats, self.preconditioner, self.krylov_rtol, self.krylov_atol_factor * (self.tol or 0.),
+                self.krylov_restart, self.krylov_maxiter
+            )
+        if sparse.issparse(matrix):
+            return splu(matrix)
+        if not self.batch_shape:
+            return linalg.lu_factor(matrix)
+        return matrix
+
+    def lu_solve(self, lu_factor, rhs):
+        self.stats.linear_solves += 1
+        if isinstance(lu_factor, KrylovSolver):
+            return lu_factor.solve(rhs)
+        if isinstance(lu_factor, SuperLU):
+            return lu_factor.solve(rhs)
+        if not self.batch_shape:
+            return linalg.lu_solve(lu_factor, rhs)
+        return np.linalg.solve(lu_factor, rhs[..., None])[..., 0]
 
     def phi_solve(self, t0, y0, init_val, J, M):
         """
@@ -44,19 +226,30 @@ class ImplicitRungeKutta(ODESolver):
         M = maximal number of Newton iterations
         Returns:
         -------------
-        The stage derivative Y’_i
+        The stage derivative Y’_i, None when the contraction of a reused Jacobian is too slow
         """
-
-        JJ = np.eye(self.s * self.num_init_conditions) - self.h * np.kron(self.A, J)
-        lu_factor = linalg.lu_factor(JJ)
+        lu_factor = self.factorize(J)
+        norm_prev = None
         for i in range(M):
+            self.stats.newton_iterations += 1
             init_val, norm_d = self.phi_newtonstep(t0, y0, init_val, lu_factor)
             if norm_d < self.tol:
                 break
             elif i == M - 1:
+                self.stats.convergence_failures += 1
                 raise ValueError("The Newton iteration did not converge.")
+            elif self.is_contraction_degraded(norm_d, norm_prev):
+                self.stats.convergence_failures += 1
+                return None
+            norm_prev = norm_d
         return init_val
 
+    def is_contraction_degraded(self, norm_d, norm_prev):
+        return (
+            not self.jacobian_is_fresh and norm_prev is not None
+            and norm_d > self.contraction_limit * norm_prev
+        )
+
 
     def phi_newtonstep(self, t0, y0, init_val, lu_factor):
         """
@@ -72,9 +265,9 @@ class ImplicitRungeKutta(ODESolver):
         Returns:
         The difference Y^(n+1)_i-Y^(n)_i
         """
-        d = linalg.lu_solve(lu_factor, -self.F(init_val.flatten(), t0, y0))
-        return init_val.flatten() + d, linalg.norm(d)
-    
+        d = self.newton_solve(lu_factor, -self.F(init_val, t0, y0))
+        return init_val + d, np.max(np.linalg.norm(d, axis=-1))
+
     def F(self, stage_der, t0, y0):
         """
         Returns the subtraction Y’_{i}-f(t_{n}+c_{i}*h, Y_{i}), where Y are
@@ -82,15 +275,16 @@ class ImplicitRungeKutta(ODESolver):
         the IVP y’=f(t,y) that should be solved by the RK-method.
         Parameters:
         -------------
-        stage_der = initial guess of the stage derivatives Y’
+        stage_der = initial guess of the stage derivatives Y’ (flattened, with leading batch axis for an ensemble)
         t0 = float, current timestep
         y0 = 1 x m vector, the last solution y_n. Where m is the length of the initial condition y_0 of the IVP.
         """
-        stage_der_new = np.empty((self.s, self.num_init_conditions))  # the i:th stage_der is on the i:th row
-        for i in range(self.s):  # iterate over all stage_der
-            stageVal = y0 + np.array([
-                self.h * np.dot(self.A[i,:],
-                stage_der.reshape(self.s, self.num_init_conditions)[:, j]) for j in range(self.num_init_conditions)
-            ])
-            stage_der_new[i, :] = self.f(t0 + self.c[i] * self.h, stageVal)  # the ith stage_der is set on the ith row
-        return stage_der - stage_der_new.reshape(-1)
+        stage_der = stage_der.reshape(self.batch_shape + (self.s, self.num_init_conditions))
+        stage_val = y0[..., None, :] + self.h * (self.A @ stage_der)  # (A x I) product, the i:th stage value on the i:th row
+        if self.f_stages is not None:  # all s stages in one call
+            stage_der_new = self.f_stages((t0 + self.c * self.h)[:, None], stage_val)
+        else:
+            stage_der_new = np.empty(stage_der.shape)  # the i:th stage_der is on the i:th row
+            for i in range(self.s):  # iterate over all stage_der
+                stage_der_new[..., i, :] = self.f(t0 + self.c[i] * self.h, stage_val[..., i, :])
+        return (stage_der - stage_der_new).reshape(stage_der.shape[:-2] + (-1,))
@@ -0,0 +1,183 @@
+import time
+
+import numpy as np
+
+from .newton_krylov import JacobianOperator
+from .sparse_jacobian import color_columns, finite_difference_jacobian
+from ode_models import ODEModel, array_backend
+
+
+def load_autograd():
+    """
+    autograd, imported by the first autograd Jacobian (it is slow to import). From then on the
+    right-hand sides of ode_models use autograd.numpy, so autograd can trace them.
+    """
+    import autograd
+    import autograd.core
+    import autograd.numpy
+    array_backend.use(autograd.numpy)
+    return autograd
+
+
+class JacobianProvider:
+    """Jacobian df/dy of the right-hand side, consumed by the implicit solvers."""
+
+    name = None
+    matrix_free = False  # returns a JacobianOperator (products J @ v only) instead of a matrix
+
+    def __call__(self, t, y):
+        """Returns m x m matrix (batch_shape x m x m for an ensemble), df/dy evaluated in (t, y)."""
+        raise NotImplementedError
+
+
+class AutogradJacobian(JacobianProvider):
+    """Reverse mode autograd, f has to be written against autograd.numpy."""
+
+    name = "autograd"
+
+    def __init__(self, f, batch_shape=()):
+        self.f = f
+        self.batch_shape = batch_shape
+
+    def __call__(self, t, y):
+        autograd = load_autograd()
+        # f of one trajectory only depends on its own y, so the Jacobian
+        # of the summed f over the batch holds all blocks (m x N x m)
+        if not self.batch_shape:
+            return autograd.jacobian(self.f, 1)(t, y)
+        J = autograd.jacobian(lambda y: autograd.numpy.sum(self.f(t, y), axis=0))(y)
+        return np.moveaxis(J, 0, -2)
+
+
+class AnalyticJacobian(JacobianProvider):
+    """User supplied jac(t, y) of ODEModel, dense or scipy.sparse."""
+
+    name = "analytic"
+
+    def __init__(self, jac):
+        self.jac = jac
+
+    def __call__(self, t, y):
+        return self.jac(t, y)
+
+
+class FiniteDifferenceJacobian(JacobianProvider):
+    """
+    Forward differences. With a sparsity pattern the columns are colored and perturbed together,
+    one f evaluation per color (about the bandwidth) instead of m, the result is scipy.sparse.
+    """
+
+    name = "finite_differences"
+
+    def __init__(self, f, sparsity=None, batch_shape=()):
+        if sparsity is not None and batch_shape:
+            raise ValueError("Sparse Jacobians are not supported for ensembles.")
+        self.f = f
+        self.sparsity = sparsity
+        self.batch_shape = batch_shape
+        self.colors = None if sparsity is None else color_columns(sparsity)
+
+    def __call__(self, t, y):
+        if self.sparsity is not None:
+            return finite_difference_jacobian(self.f, t, y, self.sparsity, self.colors)
+        f0 = self.f(t, y)
+        eps = np.sqrt(np.finfo(float).eps) * np.maximum(1., np.abs(y))
+        J = np.empty(y.shape + y.shape[-1:])
+        for j in range(y.shape[-1]):  # column j of all trajectories at once
+            y_perturbed = np.array(y)
+            y_perturbed[..., j] += eps[..., j]
+            J[..., :, j] = (self.f(t, y_perturbed) - f0) / eps[..., j, None]
+        return J
+
+
+class AutogradJacobianVectorProduct(JacobianProvider):
+    """Matrix-free, forward mode autograd: one J @ v costs about one f evaluation."""
+
+    name = "autograd_jvp"
+    matrix_free = True
+
+    def __init__(self, f):
+        self.f = f
+
+    def __call__(self, t, y):
+        autograd = load_autograd()
+        y = np.array(y)  # the linearization point, the solver updates its y in place
+        jvp = autograd.core.make_jvp(lambda y: self.f(t, y), y)
+        return JacobianOperator(t, y, lambda v: jvp(v)[1])
+
+
+class FiniteDifferenceJacobianVectorProduct(JacobianProvider):
+    """
+    Matrix-free, directional differences J @ v = (f(t, y + eps*v) - f(t, y)) / eps with
+    eps = sqrt(machine eps) * (1 + ||y||) / ||v|| per trajectory, one f evaluation per product.
+    """
+
+    name = "finite_difference_jvp"
+    matrix_free = True
+
+    def __init__(self, f):
+        self.f = f
+
+    def __call__(self, t, y):
+        y = np.array(y)  # the linearization point, the solver updates its y in place
+        f0 = self.f(t, y)
+        y_norm = np.linalg.norm(y, axis=-1, keepdims=True)
+
+        def jvp(v):
+            v_norm = np.linalg.norm(v, axis=-1, keepdims=True)
+            eps = np.sqrt(np.finfo(float).eps) * (1 + y_norm) / np.where(v_norm > 0, v_norm, 1.)
+            return (self.f(t, y + eps * v) - f0) / eps
+        return JacobianOperator(t, y, jvp)
+
+
+def available_jacobian_providers(ode_problem: ODEModel, f, params=None, batch_shape=()):
+    """Returns the providers that can be used for the problem, the preferred one first."""
+    providers = []
+    if ode_problem.jac is not None:
+        jac = ode_problem.jac
+        if params is not None:
+            jac = lambda t, y: ode_problem.jac(t, y, params)
+        providers.append(AnalyticJacobian(jac))
+    sparsity = ode_problem.jac_sparsity() if callable(ode_problem.jac_sparsity) else ode_problem.jac_sparsity
+    if sparsity is not None and not batch_shape:
+        providers.append(FiniteDifferenceJacobian(f, sparsity))
+    providers.append(AutogradJacobian(f, batch_shape))
+    if sparsity is None or batch_shape:
+        providers.append(FiniteDifferenceJacobian(f, batch_shape=batch_shape))
+    providers += [AutogradJacobianVectorProduct(f), FiniteDifferenceJacobianVectorProduct(f)]
+    return providers
+
+
+def fastest_jacobian_provider(providers, t, y, repeats=3):
+    """Times every provider that assembles J in (t, y) and returns the fastest one."""
+    providers = [provider for provider in providers if not provider.matrix_free]
+    timings = []
+    for provider in providers:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            provider(t, y)
+        timings.append(time.perf_counter() - start)
+    return providers[int(np.argmin(timings))]
+
+
+def build_jacobian_provider(provider, ode_problem: ODEModel, f, params=None, batch_shape=(), t=None, y=None):
+    """
+    Parameters:
+    -------------
+    provider = None (analytic jac, else colored finite differences with jac_sparsity, else autograd),
+               "analytic", "finite_differences", "autograd", "fastest" (timed in (t, y)),
+               the matrix-free "autograd_jvp", "finite_difference_jvp" (Newton–Krylov with GMRES,
+               stiff problems also need the preconditioner of the solver)
+               or a JacobianProvider instance
+    """
+    if isinstance(provider, JacobianProvider):
+        return provider
+    providers = available_jacobian_providers(ode_problem, f, params, batch_shape)
+    if provider is None:
+        return providers[0]
+    if provider == "fastest":
+        return fastest_jacobian_provider(providers, t, y)
+    for candidate in providers:
+        if candidate.name == provider:
+            return candidate
+    raise ValueError(f"The Jacobian provider '{provider}' is not available for this problem.")
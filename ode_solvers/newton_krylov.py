@@ -0,0 +1,128 @@
+# matrix-free linear algebra of the Newton iterations (Jacobian-free Newton–Krylov)
+
+import inspect
+
+import numpy as np
+import scipy.sparse as sparse
+from scipy.sparse.linalg import LinearOperator, aslinearoperator, gmres, splu
+
+
+# scipy < 1.12 calls the relative tolerance of gmres tol (requirements.txt pins scipy 1.8)
+GMRES_RTOL = "rtol" if "rtol" in inspect.signature(gmres).parameters else "tol"
+
+
+class JacobianOperator(LinearOperator):
+    """
+    df/dy in (t, y) as a scipy LinearOperator that is never assembled, only the products J @ v are
+    evaluated (jvp). For an ensemble the operator acts on the flattened batch_shape x m vectors.
+    """
+
+    def __init__(self, t, y, jvp):
+        self.t = t
+        self.y = y
+        self.jvp = jvp  # v (shape of y) -> J @ v
+        super().__init__(float, (y.size, y.size))
+
+    def apply(self, v):
+        """J @ v for v with the shape of y."""
+        return self.jvp(v)
+
+    def _matvec(self, x):
+        return self.apply(x.reshape(self.y.shape)).ravel()
+
+    def spectral_radius(self, iterations=20):
+        """Estimate of max |lambda(J)| by power iteration (a lower bound of the spectral radius)."""
+        v = np.random.default_rng(0).standard_normal(self.y.shape)  # not orthogonal to (1, ..., 1)
+        v /= np.linalg.norm(v)
+        radius = 0.
+        for _ in range(iterations):
+            w = self.apply(v)
+            radius = np.linalg.norm(w)
+            if radius == 0:
+                break
+            v = w / radius
+        return radius
+
+
+class NewtonOperator(LinearOperator):
+    """
+    The Newton matrix I - h * kron(A, J) of an s-stage method as a LinearOperator, one J @ v per stage
+    and product. Used with A = [[1]] for the m x m matrices I - h*gamma*J.
+    """
+
+    def __init__(self, J: JacobianOperator, A, h):
+        self.J = J
+        self.A = np.atleast_2d(A)
+        self.h = h
+        self.s = self.A.shape[0]
+        size = self.s * J.y.size
+        super().__init__(float, (size, size))
+
+    def _matvec(self, x):
+        X = x.reshape(self.J.y.shape[:-1] + (self.s, self.J.y.shape[-1]))
+        JX = np.stack([self.J.apply(X[..., i, :]) for i in range(self.s)], axis=-2)
+        return (X - self.h * (self.A @ JX)).ravel()
+
+
+class KrylovSolver:
+    """
+    Replaces the LU factorization of the Newton matrix: every solve is a restarted GMRES iteration.
+    The optional preconditioner(t, y, scale) returns an approximate inverse of I - scale * J(t, y),
+    anything scipy.sparse.linalg.aslinearoperator accepts, it is applied block by block to the stages.
+    Stiff problems need one: unpreconditioned GMRES takes thousands of iterations per Newton step on
+    the heat equation (seconds instead of milliseconds), see sparse_lu_preconditioner.
+    """
+
+    def __init__(
+        self, matrix: NewtonOperator, stats, preconditioner=None, rtol=1e-4, atol=0., restart=30, maxiter=20
+    ):
+        self.matrix = matrix
+        self.stats = stats
+        self.rtol = rtol
+        self.atol = atol
+        self.restart = restart
+        self.maxiter = maxiter
+        self.M = None if preconditioner is None else self.block_preconditioner(preconditioner)
+
+    def block_preconditioner(self, preconditioner):
+        J = self.matrix.J
+        scales = self.matrix.h * np.diag(self.matrix.A)
+        blocks = [None if scale == 0 else aslinearoperator(preconditioner(J.t, J.y, scale)) for scale in scales]
+        shape = J.y.shape[:-1] + (len(blocks), J.y.shape[-1])
+
+        def apply(x):
+            X = x.reshape(shape)
+            Y = np.array(X)
+            for i, M in enumerate(blocks):
+                if M is not None:
+                    Y[..., i, :] = M.matvec(X[..., i, :].ravel()).reshape(J.y.shape)
+            return Y.ravel()
+        return LinearOperator(self.matrix.shape, matvec=apply, dtype=float)
+
+    def solve(self, rhs):
+        iterations = [0]
+
+        def count(residual):
+            iterations[0] += 1
+        d, info = gmres(
+            self.matrix, rhs.ravel(), atol=self.atol, restart=self.restart, maxiter=self.maxiter,
+            M=self.M, callback=count, callback_type='pr_norm', **{GMRES_RTOL: self.rtol}
+        )
+        self.stats.krylov_iterations += iterations[0]
+        if info < 0:
+            raise ValueError("GMRES failed on the Newton system.")
+        if info > 0:  # inexact Newton step, the Newton iteration decides about convergence
+            self.stats.linear_solver_failures += 1
+        return d.reshape(rhs.shape)
+
+
+def sparse_lu_preconditioner(jac):
+    """
+    preconditioner(t, y, scale) for KrylovSolver: the sparse LU factorization of I - scale * jac(t, y)
+    with an approximate (e.g. lagged or lower order) Jacobian jac, dense or scipy.sparse.
+    """
+    def preconditioner(t, y, scale):
+        J = sparse.csc_matrix(jac(t, y))
+        lu = splu(sparse.identity(J.shape[0], format="csc") - scale * J)
+        return LinearOperator(J.shape, matvec=lu.solve, dtype=float)
+    return preconditioner
@@ -1,10 +1,11 @@
-import autograd.numpy as np
-from autograd import grad, jacobian
-from scipy import linalg
+import numpy as np
 from typing import Callable
-import numpy.typing as npt
 
-from ode_models import ODEModel
+from .dense_output import DenseOutput
+from .solution_storage import ArrayStorage, MemmapStorage
+from .statistics import SolverStatistics
+from ode_models import ODEModel, array_backend
+from butcher_tables import ButcherTableau, tableau_from_arrays
 
 
 class ODESolver:
@@ -15,10 +16,33 @@ class ODESolver:
         u(t_0) = U_t0
     """
 
-    def __init__(self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float):
-        self.f = ode_problem.f
-        self.y0 = ode_problem.y0.astype(float)  # initial condition
-        self.num_init_conditions = len(self.y0)
+    # PI step-size controller constants (adaptive mode)
+    safety = 0.9
+    min_factor = 0.2
+    max_factor = 5.0
+
+    # phases timed with profile=True: phase name -> solver method
+    profiled_phases = {"step": "stage_derivatives"}
+
+    def __init__(
+        self, ode_problem: ODEModel, A: np.array, b: np.array, c: np.array, tolerance: float,
+        b_hat: np.array = None, embedded_order: int = None, rtol: float = None, atol: float = None,
+        y0: np.array = None, params: np.array = None, dense_output: bool = False,
+        save_every: int = 1, output_file: str = None, tableau: ButcherTableau = None,
+        profile: bool = False, step_hooks: list = None, stats: SolverStatistics = None
+    ):
+        # ensemble: y0 (and params) may carry a leading batch axis, y0.shape = (N, m)
+        self.y0 = (ode_problem.y0 if y0 is None else np.asarray(y0)).astype(float)  # initial condition
+        self.num_init_conditions = self.y0.shape[-1]
+        self.batch_shape = self.y0.shape[:-1]  # () for a single trajectory, (N,) for an ensemble
+        params = ode_problem.params if params is None else params
+        self.params = params
+
+        # work counters and, with profile=True, the wall time per phase (see statistics.SolverStatistics),
+        # shared with the solver it is given to:
+        self.stats = SolverStatistics() if stats is None else stats
+        self.f = self.counted(self.build_rhs(ode_problem, params))
+        self.f_stages = self.build_stage_rhs(ode_problem, params)  # None unless f is vectorized
 
         self.u = None  # solution
         self.i = None  # current number of step iteration
@@ -28,25 +52,213 @@ class ODESolver:
 
         self.tol = tolerance
 
-        # setting Butcher table properties:
-        self.A = A
-        self.b = b
-        self.c = c
-        self.s = len(self.b)
-        
+        # setting Butcher table properties (precomputed once per table, see butcher_tables.get_tableau):
+        self.tableau = tableau if tableau is not None else tableau_from_arrays(A, b, c, b_hat)
+        self.A = self.tableau.A
+        self.b = self.tableau.b
+        self.c = self.tableau.c
+        self.s = self.tableau.s
+
+        # adaptive step-size control, enabled by rtol and/or atol:
+        self.adaptive = rtol is not None or atol is not None
+        if self.adaptive and b_hat is None:
+            raise ValueError("Adaptive step-size control needs an embedded Butcher pair (b_hat).")
+        self.b_hat = self.tableau.b_hat
+        self.embedded_order = self.tableau.embedded_order if embedded_order is None else embedded_order
+        self.rtol = rtol if rtol is not None else 1e-3
+        self.atol = atol if atol is not None else 1e-6
+
+        # solution storage: every save_every-th point, streamed to the .npy output_file when given
+        self.save_every = save_every
+        self.output_file = output_file
+
+        # dense output, the continuous solution self.sol(t) is built while stepping:
+        self.dense_output = dense_output
+        self.sol = None
+        self.K = None  # stage derivatives of the last step
+        self.first_stage_explicit = self.c[0] == 0 and not np.any(self.A[0])  # K_1 = f(t_n, y_n)
+        if self.f_stages is not None:
+            self.f_stages = self.counted(self.f_stages, self.s)
+
+        # hook(solver, t_i, y_i) is called after every accepted step, nothing is wrapped without hooks:
+        self.step_hooks = list(step_hooks or [])
+        if profile:
+            self.enable_profiling()
+
+    @classmethod
+    def from_tableau(cls, ode_problem: ODEModel, tableau: ButcherTableau, tolerance: float, **kwargs):
+        """Solver for a registry tableau, see butcher_tables.get_tableau."""
+        return cls(ode_problem, tableau.A, tableau.b, tableau.c, tolerance, b_hat=tableau.b_hat, tableau=tableau, **kwargs)
+
+    def build_rhs(self, ode_problem: ODEModel, params: np.array):
+        """
+        Returns f(t, y) evaluated on y of shape batch_shape x m. The parameters are bound to the
+        right-hand side, a non vectorized f is evaluated trajectory by trajectory.
+        """
+        f = ode_problem.f
+        if params is None:
+            rhs = f
+        else:
+            rhs = lambda t, y: f(t, y, params)
+        if not self.batch_shape or ode_problem.vectorized:
+            return rhs
+        # stacked by the backend of f, autograd traces through the loop
+        if params is None or np.ndim(params) < 2:
+            return lambda t, y: array_backend.stack([rhs(t, y_n) for y_n in y])
+        return lambda t, y: array_backend.stack([f(t, y_n, p_n) for y_n, p_n in zip(y, params)])
+
+    def build_stage_rhs(self, ode_problem: ODEModel, params: np.array):
+        """
+        Stage-vectorized protocol: for a vectorized f returns f(t, Y) evaluated for all s stages in one
+        call, t.shape = (s, 1) and Y.shape = batch_shape x s x m. Batched parameters get a stage axis.
+        """
+        f = ode_problem.f
+        if not ode_problem.vectorized:
+            return None
+        if params is None:
+            return f
+        if np.ndim(params) < 2:
+            return lambda t, y: f(t, y, params)
+        return lambda t, y: f(t, y, params[..., None, :])
+
+    def counted(self, f, evaluations=1):
+        """f that adds evaluations to stats.f_evaluations on every call (one call covers the whole ensemble)."""
+        stats = self.stats
+
+        def counted_f(t, y):
+            stats.f_evaluations += evaluations
+            return f(t, y)
+        return counted_f
+
+    def enable_profiling(self):
+        """
+        Replaces f and the methods of profiled_phases by timed wrappers on this instance, the
+        cumulative wall time per phase is collected in stats.phase_times.
+        """
+        self.f = self.stats.timed("f", self.f)
+        if self.f_stages is not None:
+            self.f_stages = self.stats.timed("f", self.f_stages)
+        for phase, method in self.profiled_phases.items():
+            setattr(self, method, self.stats.timed(phase, getattr(self, method)))
+
+    def add_step_hook(self, hook: Callable):
+        """Attaches hook(solver, t_i, y_i), called after every accepted step (a profiler, a logger, ...)."""
+        self.step_hooks.append(hook)
+
     def step(self):
-        ti, yi = self.t[0], self.y0  # initial condition points
+        if self.dense_output:
+            self.sol = DenseOutput()
+        steps = self.adaptive_step() if self.adaptive else self.fixed_step()
+        if not self.step_hooks:
+            yield from steps
+            return
+        for ti, yi in steps:
+            for hook in self.step_hooks:
+                hook(self, ti, yi)
+            yield ti, yi
+
+    def fixed_step(self):
+        ti, yi = self.t[0], np.array(self.y0)  # initial condition points
         current_time_point = ti
         yield ti , np.array(yi)  # first point (begging point)
         for ti in self.t[1:]:
-            yi += self.h * self.phi(current_time_point, yi)
+            increment = self.phi(current_time_point, yi)
+            if self.dense_output:
+                self.sol.append(current_time_point, yi, self.point_derivative(current_time_point, yi))
+            yi += self.h * increment
+            self.stats.accepted_steps += 1
             current_time_point = ti
             yield ti, np.array(yi)
+        if self.dense_output:
+            self.sol.append(ti, yi, self.point_derivative(ti, yi, last_point=True))
+
+    def point_derivative(self, t, y, last_point=False):
+        """y'(t_n) = f(t_n, y_n) for dense output, reused from the first stage of the step when it is explicit."""
+        if self.first_stage_explicit and not last_point:
+            return self.K[..., 0, :]
+        return self.f(t, y)
+
+    def adaptive_step(self):
+        """
+        Walks from t_0 to T with a PI step-size controller. The local error is estimated by the
+        embedded pair, err = h * sum((b_j - b_hat_j) * Y'_j), measured in the weighted RMS norm
+        with atol + rtol * |y|. A step with err > 1 is rejected and retried with a smaller h.
+        The initial step is the fixed-grid step given by number_of_points_to_discretization.
+        """
+        k = self.embedded_order + 1
+        alpha, beta = 0.7 / k, 0.4 / k  # Gustafsson PI controller exponents
+        err_prev = 1.
+        rejected = False
+
+        ti, t_end = self.t[0], self.t[-1]
+        yi = np.array(self.y0)
+        yield ti, np.array(yi)
+        while ti < t_end:
+            last_step = ti + self.h >= t_end
+            if last_step:
+                self.h = t_end - ti
+            if self.h <= 16 * np.finfo(float).eps * np.abs(ti):
+                raise ValueError("The step size became too small.")
+
+            K = self.stage_derivatives(ti, yi)
+            y_new = yi + self.h * (self.b @ K)
+            err = self.error_norm(self.h * ((self.b - self.b_hat) @ K), yi, y_new)
+
+            if err <= 1.:
+                if self.dense_output:
+                    self.K = K
+                    self.sol.append(ti, yi, self.point_derivative(ti, yi))
+                ti = t_end if last_step else ti + self.h
+                yi = y_new
+                self.stats.accepted_steps += 1
+                factor = self.safety * max(err, 1e-10) ** -alpha * err_prev ** beta
+                factor = min(self.max_factor, max(self.min_factor, factor))
+                if rejected:
+                    factor = min(1., factor)
+                err_prev = max(err, 1e-4)
+                rejected = False
+                yield ti, np.array(yi)
+            else:
+                self.stats.rejected_steps += 1
+                factor = max(self.min_factor, self.safety * err ** (-1. / k))
+                rejected = True
+            self.h = self.h * factor
+        if self.dense_output:
+            self.sol.append(ti, yi, self.point_derivative(ti, yi, last_point=True))
+
+    def error_norm(self, error, y, y_new):
+        """Weighted RMS norm of the local error estimate, the worst trajectory for an ensemble."""
+        scale = self.atol + self.rtol * np.maximum(np.abs(y), np.abs(y_new))
+        return np.max(np.sqrt(np.mean((error / scale) ** 2, axis=-1)))
 
     def solve(self):
-        return np.array(list(self.step()))
+        """
+        Returns:
+        -------------
+        N x (1 + m) array, the i:th row is (t_i, y_i)
+        (N x (1 + batch * m) for an ensemble, the i:th row is (t_i, y_i of all trajectories flattened))
+        A read-only memory map of the .npy file when output_file is given.
+        """
+        storage = self.create_storage()
+        for ti, yi in self.step():
+            storage.append(ti, yi)
+        return storage.result()
+
+    def create_storage(self):
+        width = 1 + self.y0.size
+        if self.output_file is not None:
+            return MemmapStorage(self.output_file, width, self.save_every)
+        capacity = 1024 if self.adaptive else len(self.t) // self.save_every + 2
+        return ArrayStorage(width, self.save_every, capacity)
 
     def phi(self, current_time, current_y):
-        """Advance solution one time step."""
+        """
+        Advance solution one time step:
+        y_{n+1} = y_{n} + h * sum_{j=1}^{s} b_{j}*Y'_j
+        """
+        self.K = self.stage_derivatives(current_time, current_y)
+        return self.b @ self.K
+
+    def stage_derivatives(self, current_time, current_y):
+        """Returns s x m array (batch_shape x s x m), the stage derivatives Y'_j of one step."""
         raise NotImplementedError
-    
\ No newline at end of file
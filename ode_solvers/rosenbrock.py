@@ -0,0 +1,82 @@
+# implementation of Rosenbrock and W-methods (linearly implicit, one LU factorization and s linear solves per step)
+
+import numpy as np
+
+from .implicit_runge_kutta import ImplicitRungeKutta
+from ode_models import ODEModel
+from rosenbrock_tables import RosenbrockTableau
+
+
+class RosenbrockMethod(ImplicitRungeKutta):
+    """
+    Rosenbrock / W-method in the transformed form (see rosenbrock_tables), no Newton iteration:
+        (I - h*gamma*J) u_i = h*gamma * (f(t_n + alpha_i*h, y_n + sum_{j<i} a_{ij}*u_j) + sum_{j<i} c_{ij}/h*u_j + d_i*h*f_t)
+        y_{n+1} = y_n + sum_i m_i*u_i
+    The step loops of ODESolver see the stage derivatives K_i = u_i / h with the weights m (and m_hat).
+    A W-method reuses its Jacobian for jacobian_refresh_interval steps (and until a step is rejected),
+    a Rosenbrock method needs the exact Jacobian of every step. f_t is a forward difference.
+    """
+
+    jacobian_refresh_interval = 20  # steps a W-method keeps its Jacobian
+
+    def __init__(
+        self, ode_problem: ODEModel, tableau: RosenbrockTableau, tolerance: float, reuse_jacobian: bool = None, **kwargs
+    ):
+        reuse_jacobian = tableau.w_method if reuse_jacobian is None else reuse_jacobian
+        if reuse_jacobian and not tableau.w_method:
+            raise ValueError(f"{tableau.name} is not a W-method, it loses its order with a stale Jacobian.")
+        super().__init__(
+            ode_problem, tableau.a, tableau.m, tableau.alpha, tolerance, b_hat=tableau.m_hat,
+            embedded_order=tableau.embedded_order, reuse_jacobian=reuse_jacobian, eigen_transform=False, **kwargs
+        )
+        self.rosenbrock_tableau = tableau
+        self.gamma = tableau.gamma
+        self.C = tableau.C
+        self.d = tableau.d
+        self.first_stage_explicit = False  # K_1 = u_1 / h is not f(t_n, y_n)
+        self.jacobian_age = 0  # steps since the Jacobian was evaluated
+        self.rejected_steps_seen = 0
+
+    @classmethod
+    def from_tableau(cls, ode_problem: ODEModel, tableau: RosenbrockTableau, tolerance: float, **kwargs):
+        """Solver for a registry tableau, see rosenbrock_tables.get_rosenbrock_tableau."""
+        return cls(ode_problem, tableau, tolerance, **kwargs)
+
+    def stage_derivatives(self, t0, y0):
+        """
+        One linearly implicit step: one LU factorization of I - h*gamma*J (reused while J and h
+        are unchanged) and s linear solves.
+        Returns:
+        -------------
+        s x m (batch_shape x s x m) array u_i / h
+        """
+        refresh = (
+            self.jacobian_age >= self.jacobian_refresh_interval
+            or self.stats.rejected_steps > self.rejected_steps_seen
+        )
+        self.rejected_steps_seen = self.stats.rejected_steps
+        J = self.current_jacobian(t0, y0, refresh=refresh)
+        self.jacobian_age = 0 if self.jacobian_is_fresh else self.jacobian_age + 1
+        lu_factor = self.factorize(J)
+
+        h = self.h
+        f0 = self.f(t0, y0)
+        f_t = self.time_derivative(t0, y0, f0) if np.any(self.d) else 0.
+        u = np.empty(self.batch_shape + (self.s, self.num_init_conditions))
+        for i in range(self.s):
+            if i == 0 and self.c[0] == 0:
+                stage_f = f0
+            else:
+                stage_f = self.f(t0 + self.c[i] * h, y0 + self.A[i, :i] @ u[..., :i, :])
+            rhs = stage_f + (self.C[i, :i] / h) @ u[..., :i, :] + self.d[i] * h * f_t
+            u[..., i, :] = self.lu_solve(lu_factor, h * self.gamma * rhs)
+        return u / h
+
+    def time_derivative(self, t, y, f0):
+        """Forward difference approximation of df/dt in (t, y)."""
+        delta = np.sqrt(np.finfo(float).eps) * np.maximum(1., np.abs(t))
+        return (self.f(t + delta, y) - f0) / delta
+
+    def newton_matrix(self, J):
+        """The m x m matrix I - h * gamma * J, shared by all stages."""
+        return self.identity_minus(self.h * self.gamma, J)
@@ -0,0 +1,100 @@
+import struct
+
+import numpy as np
+
+
+class SolutionStorage:
+    """
+    Collects the solution points (t_i, y_i) as rows of one float array: time column plus state
+    columns. Only every k-th point is kept (the first and the last point always are).
+    """
+
+    def __init__(self, width: int, every: int = 1):
+        self.width = width
+        self.every = every
+        self.count = 0  # points seen
+        self.last = None  # last point that was not stored yet
+
+    def append(self, t, y):
+        if self.count % self.every == 0:
+            self.write(t, y)
+            self.last = None
+        else:
+            self.last = (t, y)
+        self.count += 1
+
+    def result(self):
+        if self.last is not None:
+            self.write(*self.last)
+            self.last = None
+        return self.finalize()
+
+    def write(self, t, y):
+        raise NotImplementedError
+
+    def finalize(self):
+        raise NotImplementedError
+
+
+class ArrayStorage(SolutionStorage):
+    """Preallocated contiguous array, doubled when the number of points is not known in advance."""
+
+    def __init__(self, width: int, every: int = 1, capacity: int = 1024):
+        super().__init__(width, every)
+        self.data = np.empty((max(capacity, 2), width))
+        self.rows = 0
+
+    def write(self, t, y):
+        if self.rows == len(self.data):
+            self.data = np.concatenate((self.data, np.empty(self.data.shape)))
+        row = self.data[self.rows]
+        row[0] = np.squeeze(t)
+        row[1:] = np.ravel(y)
+        self.rows += 1
+
+    def finalize(self):
+        return self.data[:self.rows]
+
+
+class MemmapStorage(SolutionStorage):
+    """
+    Streams the rows to a .npy file in chunks of chunk_size rows, so the RAM in use is bounded by
+    one chunk. The header is rewritten with the final shape at the end, the result is the file
+    opened as a read-only memory map.
+    """
+
+    header_length = 128  # reserved bytes of the .npy header, enough for any number of rows
+
+    def __init__(self, path: str, width: int, every: int = 1, chunk_size: int = 65536):
+        super().__init__(width, every)
+        self.path = path
+        self.chunk = np.empty((chunk_size, width))
+        self.chunk_rows = 0
+        self.rows = 0
+        self.file = open(path, 'wb')
+        self.file.write(self.header((0, width)))
+
+    def header(self, shape):
+        header = "{'descr': '<f8', 'fortran_order': False, 'shape': %r, }" % (shape,)
+        header = header.ljust(self.header_length - 11) + '\n'
+        return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+    def write(self, t, y):
+        row = self.chunk[self.chunk_rows]
+        row[0] = np.squeeze(t)
+        row[1:] = np.ravel(y)
+        self.chunk_rows += 1
+        self.rows += 1
+        if self.chunk_rows == len(self.chunk):
+            self.flush()
+
+    def flush(self):
+        self.chunk[:self.chunk_rows].astype('<f8').tofile(self.file)
+        self.chunk_rows = 0
+
+    def finalize(self):
+        self.flush()
+        self.file.seek(0)
+        self.file.write(self.header((self.rows, self.width)))
+        self.file.close()
+        return np.load(self.path, mmap_mode='r')
@@ -0,0 +1,58 @@
+import numpy as np
+from scipy import sparse
+
+
+def color_columns(sparsity):
+    """
+    Greedy coloring of the Jacobian columns: two columns get the same color only when they share
+    no row of the sparsity pattern, so one perturbation of all columns of a color is enough.
+    Parameters:
+    -------------
+    sparsity = m x m sparsity pattern (array or scipy.sparse matrix), nonzero where df_i/dy_j may be nonzero
+    Returns:
+    -------------
+    1 x m vector of colors, colors[j] is the group of column j
+    """
+    pattern = sparse.csc_matrix(sparsity, dtype=bool)
+    conflicts = (pattern.T @ pattern).tocsr()  # columns j, k conflict when they share a row
+    m = pattern.shape[1]
+    colors = np.full(m, -1)
+    for j in range(m):
+        neighbours = conflicts.indices[conflicts.indptr[j]:conflicts.indptr[j + 1]]
+        used = colors[neighbours]
+        color = 0
+        while np.any(used == color):
+            color += 1
+        colors[j] = color
+    return colors
+
+
+def finite_difference_jacobian(f, t, y, sparsity, colors, f0=None):
+    """
+    Sparse Jacobian df/dy by forward differences, one f evaluation per color.
+    Parameters:
+    -------------
+    f = right-hand side f(t, y)
+    t = float, current time
+    y = 1 x m vector
+    sparsity = m x m sparsity pattern
+    colors = column colors, see color_columns
+    f0 = f(t, y) when it is known already
+    Returns:
+    -------------
+    m x m scipy.sparse.csc_matrix
+    """
+    pattern = sparse.csc_matrix(sparsity, dtype=bool)
+    pattern.sort_indices()
+    if f0 is None:
+        f0 = f(t, y)
+    eps = np.sqrt(np.finfo(float).eps) * np.maximum(1., np.abs(y))
+    differences = np.empty((colors.max() + 1, len(y)))
+    for color in range(len(differences)):
+        perturbation = np.where(colors == color, eps, 0.)
+        differences[color] = f(t, y + perturbation) - f0
+
+    rows = pattern.indices
+    columns = np.repeat(np.arange(pattern.shape[1]), np.diff(pattern.indptr))
+    data = differences[colors[columns], rows] / eps[columns]
+    return sparse.csc_matrix((data, rows, pattern.indptr), shape=pattern.shape)
@@ -0,0 +1,59 @@
+import time
+from dataclasses import dataclass, field, asdict
+
+
+@dataclass
+class SolverStatistics:
+    """
+    Work counters of one solver, always on. Cumulative wall time per phase is only measured
+    when the solver is built with profile=True (the phases nest: f time is also part of the
+    jacobian and newton phases).
+    """
+    f_evaluations: int = 0
+    jacobian_evaluations: int = 0
+    jacobian_reuses: int = 0  # saved Jacobian evaluations
+    factorizations: int = 0
+    factorization_reuses: int = 0  # saved LU factorizations
+    linear_solves: int = 0
+    krylov_iterations: int = 0  # GMRES iterations of the matrix-free Newton mode
+    linear_solver_failures: int = 0  # GMRES stopped at maxiter above its tolerance (an inexact Newton step)
+    newton_iterations: int = 0
+    newton_solves: int = 0  # steps with a Newton iteration
+    newton_iterations_last_step: int = 0
+    max_newton_iterations_per_step: int = 0
+    convergence_failures: int = 0  # Newton: slow contraction with a reused Jacobian, or no convergence
+    accepted_steps: int = 0
+    rejected_steps: int = 0
+    phase_times: dict = field(default_factory=dict)
+
+    @property
+    def mean_newton_iterations_per_step(self):
+        return self.newton_iterations / self.newton_solves if self.newton_solves else 0.
+
+    def record_newton_step(self, iterations):
+        self.newton_solves += 1
+        self.newton_iterations_last_step = iterations
+        self.max_newton_iterations_per_step = max(self.max_newton_iterations_per_step, iterations)
+
+    def timed(self, phase, function):
+        """Wraps function so that its wall time is added to phase_times[phase]."""
+        self.phase_times.setdefault(phase, 0.)
+        phase_times = self.phase_times
+
+        def timed_function(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                phase_times[phase] += time.perf_counter() - start
+        return timed_function
+
+    def as_dict(self):
+        statistics = asdict(self)
+        statistics["mean_newton_iterations_per_step"] = self.mean_newton_iterations_per_step
+        return statistics
+
+    def summary(self):
+        lines = [f"{name:32} {value}" for name, value in self.as_dict().items() if name != "phase_times"]
+        lines += [f"time {phase:27} {seconds:.6f} s" for phase, seconds in self.phase_times.items()]
+        return "\n".join(lines)
@@ -0,0 +1,121 @@
+"""
+Parareal, parallel-in-time integration of one trajectory.
+
+[t0, T] is split into time slices t0 = T_0 < T_1 < ... < T_N = T. A cheap coarse propagator G
+runs sequentially over the slices, an expensive fine propagator F runs on all slices at once in
+a process pool, and the slice start values are corrected iteratively:
+    U_{n+1}^{k+1} = G(U_n^{k+1}) + F(U_n^k) - G(U_n^k)
+After k iterations the first k slices are exact (equal to the serial fine solution), the
+iteration stops when the start values change less than parareal_tol.
+
+    python parareal.py [problem name] [number of slices]
+
+As in sweep.py the problem and the tables are referenced by their registry names, so nothing
+but names and arrays is sent to the worker processes.
+"""
+import sys
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+import ode_solvers
+from ode_models import ODE_PROBLEMS
+from butcher_tables import get_tableau
+
+
+@dataclass(frozen=True)
+class Propagator:
+    solver: str  # solver class name in ode_solvers
+    method: str  # name in BUTCHER_TABLES
+    steps: int   # number of steps per time slice
+
+
+COARSE_PROPAGATOR = Propagator("ExplicitRungeKutta", "ExplicitMidpointMethod", 4)
+FINE_PROPAGATOR = Propagator("ImplicitRungeKutta", "GaussLegendreSixOrder", 20)
+
+
+def propagate(problem_name, propagator: Propagator, t_start, t_end, y_start, tol):
+    """
+    Solves the problem on one time slice [t_start, t_end] from y_start.
+    Returns:
+    -------------
+    (steps + 1) x (1 + m) array, the i:th row is (t_i, y_i), see ODESolver.solve
+    """
+    problem = dataclasses.replace(
+        ODE_PROBLEMS[problem_name], t0=np.array([t_start]), T=np.array([t_end]), y0=np.array(y_start),
+        number_of_points_to_discretization=propagator.steps - 1
+    )
+    solver_class = getattr(ode_solvers, propagator.solver)
+    return np.asarray(solver_class.from_tableau(problem, get_tableau(propagator.method), tol).solve())
+
+
+def fine_propagate(args):
+    """Worker: the fine propagator on one slice."""
+    return propagate(*args)
+
+
+def solve_parareal(
+    problem_name: str,                      # name in ODE_PROBLEMS
+    slices: int = 16,                       # number of time slices
+    coarse: Propagator = COARSE_PROPAGATOR, # sequential propagator G
+    fine: Propagator = FINE_PROPAGATOR,     # parallel propagator F
+    tol: float = 1e-10,                     # Newton tolerance of the propagators
+    parareal_tol: float = 1e-8,             # max change of the slice start values at convergence
+    max_iterations: int = None,             # at most slices iterations (then the solution is the serial fine one)
+    processes: int = None                   # worker processes, all cores when None
+):
+    """
+    Returns:
+    -------------
+    N x (1 + m) array of the fine solution, the i:th row is (t_i, y_i), and the number of iterations
+    """
+    problem = ODE_PROBLEMS[problem_name]
+    T = np.linspace(np.squeeze(problem.t0), np.squeeze(problem.T), slices + 1)  # slice boundaries
+    max_iterations = slices if max_iterations is None else min(max_iterations, slices)
+
+    def coarse_end(n, y):
+        return propagate(problem_name, coarse, T[n], T[n + 1], y, tol)[-1, 1:]
+
+    U = np.empty((slices + 1, np.size(problem.y0)))  # slice start values
+    U[0] = problem.y0
+    G = np.empty(U.shape)  # coarse values G(U_n) at the slice ends, G[n + 1] from U[n]
+    for n in range(slices):
+        G[n + 1] = coarse_end(n, U[n])
+        U[n + 1] = G[n + 1]
+
+    solutions = {}  # fine trajectory of every slice
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        converged = 0  # slices [0, converged) are final
+        for iteration in range(1, max_iterations + 1):
+            # the fine propagator on all not yet converged slices at once:
+            tasks = [(problem_name, fine, T[n], T[n + 1], U[n], tol) for n in range(converged, slices)]
+            fine_solutions = dict(zip(range(converged, slices), pool.map(fine_propagate, tasks)))
+
+            # sequential correction sweep:
+            U_prev = U.copy()
+            converged += 1  # the first unconverged slice starts from an exact value
+            for n in range(converged - 1, slices):
+                if n + 1 > converged:
+                    G_new = coarse_end(n, U[n])
+                    U[n + 1] = G_new + fine_solutions[n][-1, 1:] - G[n + 1]
+                    G[n + 1] = G_new
+                else:
+                    U[n + 1] = fine_solutions[n][-1, 1:]
+            solutions.update(fine_solutions)
+            if np.max(np.abs(U - U_prev)) < parareal_tol or converged == slices:
+                break
+
+    # the fine trajectories of the last iteration, the slice start rows are shared with the previous slice:
+    u = [solutions[0]] + [solutions[n][1:] for n in range(1, slices)]
+    return np.concatenate(u), iteration
+
+
+if __name__ == "__main__":
+    problem_name = sys.argv[1] if len(sys.argv) > 1 else "problem_system_1"
+    slices = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    problem = ODE_PROBLEMS[problem_name]
+    u, iterations = solve_parareal(problem_name, slices)
+    error = np.max(np.abs(u[:, 1:] - problem.exact_test_solution(u[:, :1])))
+    print(f"{problem_name}: {slices} slices, {iterations} iterations, max error {error:.2e}")
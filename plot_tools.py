@@ -1,6 +1,15 @@
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
 import numpy as np
-from matplotlib import pyplot as plt
+
+
+MAX_PLOT_POINTS = 4000  # points drawn per line, about two per horizontal pixel of a large figure
+
+
 
 def choose_subplot_dimensions(k):
     if k < 4:
@@ -13,6 +22,7 @@ def choose_subplot_dimensions(k):
 
 
 def generate_subplots(k, row_wise=False):
+    from matplotlib import pyplot as plt  # imported on first plot, headless runs never load matplotlib
     nrow, ncol = choose_subplot_dimensions(k)
     # Choose your share X and share Y parameters as you wish:
     figure, axes = plt.subplots(nrow, ncol,
@@ -39,3 +49,116 @@ def generate_subplots(k, row_wise=False):
         axes = axes[:k]
         return figure, axes
 
+
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# DECIMATION: only the points that change the picture are drawn
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and the last point and, from each of the threshold - 2
+    buckets in between, the point spanning the largest triangle with the point kept before it and the mean
+    of the next bucket. Returns the indices of the kept points.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)  # bucket i is [edges[i], edges[i + 1])
+    edges = np.append(edges, n)  # the last point is the "next bucket" of the last bucket
+    indices = np.empty(threshold, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        x_next, y_next = np.mean(x[end:edges[i + 2]]), np.mean(y[end:edges[i + 2]])
+        area = np.abs((x[a] - x_next) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (y_next - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, buckets):
+    """
+    Indices of the minimum and the maximum of y in each of buckets equal buckets, with the first and the
+    last point, in increasing order. Keeps every extremum, the drawn envelope equals the full line.
+    """
+    n = len(y)
+    if 2 * buckets + 2 >= n:
+        return np.arange(n)
+    size = math.ceil(n / buckets)
+    full = n // size * size
+    blocks = y[:full].reshape(-1, size)
+    offsets = np.arange(0, full, size)
+    indices = [[0, n - 1], offsets + np.argmin(blocks, axis=1), offsets + np.argmax(blocks, axis=1)]
+    if full < n:
+        indices.append([full + np.argmin(y[full:]), full + np.argmax(y[full:])])
+    return np.unique(np.concatenate(indices))
+
+
+def decimate(x, y, max_points=MAX_PLOT_POINTS, method="minmax"):
+    """
+    Downsamples the line (x, y) to at most about max_points points, "minmax" (min/max bucketing) or "lttb".
+    Returns x, y unchanged when they are short enough.
+    """
+    x, y = np.ravel(x), np.ravel(y)
+    if max_points is None or len(x) <= max_points:
+        return x, y
+    if method == "minmax":
+        indices = minmax_indices(y, (max_points - 2) // 2)
+    elif method == "lttb":
+        indices = lttb(x, y, max_points)
+    else:
+        raise ValueError(f"Unknown decimation method '{method}', use 'minmax' or 'lttb'.")
+    return x[indices], y[indices]
+
+
+def plot_decimated(ax, x, y, *args, max_points=MAX_PLOT_POINTS, method="minmax", **kwargs):
+    """ax.plot of the decimated line (x, y), see decimate."""
+    return ax.plot(*decimate(x, y, max_points, method), *args, **kwargs)
+
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# HEADLESS RENDERING: figures written straight to files, many figures in a process pool
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@dataclass(frozen=True)
+class FigureJob:
+    path: str                # output file, the format follows the extension (png, pdf, svg, ...)
+    draw: Callable           # module level function draw(*args) -> matplotlib Figure, pickled by its name
+    args: tuple = ()         # picklable arguments of draw, e.g. registry names instead of ODEModels
+    dpi: int = 120
+
+
+def use_headless_backend():
+    """Selects the non-interactive Agg backend, figures can only be saved to files."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def save_figure(figure, path, dpi=120):
+    """Writes figure to path and releases it, nothing is shown."""
+    from matplotlib import pyplot as plt
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    figure.savefig(path, dpi=dpi)
+    plt.close(figure)
+    return path
+
+
+def render_figure(job: FigureJob):
+    """Worker: draws the figure of job and writes it to job.path."""
+    return save_figure(job.draw(*job.args), job.path, job.dpi)
+
+
+def render_figures(jobs, processes: int = None):
+    """
+    Draws and saves the figures of jobs in a pool of processes worker processes with the Agg backend
+    (all cores when None, in this process when 1). Returns the paths in the order of the jobs.
+    """
+    if processes == 1:
+        use_headless_backend()  # also in this process, no windows are opened
+        return [render_figure(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=processes, initializer=use_headless_backend) as pool:
+        return list(pool.map(render_figure, jobs))
@@ -0,0 +1,217 @@
+"""
+Content-addressed on-disk cache of solutions, used by main.solve.
+
+The key is a sha256 hash of everything the solution depends on: the ODEModel fields (the right-hand
+sides by their code objects, constants, default arguments, closures and the globals they read, e.g.
+heat_equation_dx), the Butcher arrays, the solver class, the tolerances, the solver options and the
+source of the solver package. Changing the model, the method or the solvers changes the key, stale
+entries are never read and age out of the cache. Entries are .npy files, the least recently used ones are evicted above max_bytes.
+
+    ODE_RESULT_CACHE=<directory>   overrides the default directory ~/.cache/ode_results
+"""
+import dataclasses
+import functools
+import hashlib
+import os
+import sys
+import sysconfig
+import tempfile
+import types
+
+import numpy as np
+
+from ode_models import ArrayBackend
+
+
+CACHE_VERSION = 1  # part of every key, bump when the entry format changes
+SOLVER_SOURCES = ("ode_solvers", "butcher_tables.py", "rosenbrock_tables.py")  # relative to this directory
+DEFAULT_CACHE_DIRECTORY = os.environ.get(
+    "ODE_RESULT_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "ode_results")
+)
+LIBRARY_PATHS = tuple({os.path.abspath(sysconfig.get_paths()[name]) for name in ("stdlib", "platstdlib", "purelib", "platlib")})
+
+
+def is_library_function(function):
+    """Functions of the standard library and installed packages are identified by their names only."""
+    module_file = getattr(sys.modules.get(function.__module__), "__file__", None)
+    return module_file is not None and os.path.abspath(module_file).startswith(LIBRARY_PATHS)
+
+
+def qualified_name(value):
+    return f"{getattr(value, '__module__', None)}.{getattr(value, '__qualname__', getattr(value, '__name__', None))}"
+
+
+def fingerprint(value, hasher, seen):
+    """
+    Feeds a deterministic description of value into hasher. Raises TypeError for values without one
+    (arbitrary objects), those runs are not cached.
+    """
+    update = lambda *parts: hasher.update("\x1f".join(map(str, parts)).encode() + b"\x1e")
+    if isinstance(value, (type(None), type(Ellipsis), bool, int, float, complex, str, bytes, slice, np.generic)):
+        update(type(value).__name__, repr(value))
+    elif isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("object arrays have no fingerprint")
+        update("ndarray", value.dtype.str, value.shape)
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif id(value) in seen:  # recursive functions and containers
+        update("seen", seen[id(value)][0])
+    elif isinstance(value, (list, tuple, dict)) or dataclasses.is_dataclass(value) or isinstance(value, types.FunctionType):
+        seen[id(value)] = (len(seen), value)  # holds value, its id is not reused while hashing
+        if isinstance(value, (list, tuple)):
+            update(type(value).__name__, len(value))
+            for item in value:
+                fingerprint(item, hasher, seen)
+        elif isinstance(value, dict):
+            update("dict", len(value))
+            for key in sorted(value, key=repr):
+                fingerprint(key, hasher, seen)
+                fingerprint(value[key], hasher, seen)
+        elif dataclasses.is_dataclass(value):
+            update("dataclass", qualified_name(type(value)))
+            for field in dataclasses.fields(value):
+                update(field.name)
+                fingerprint(getattr(value, field.name), hasher, seen)
+        elif is_library_function(value):
+            update("function", qualified_name(value))
+        else:
+            function_fingerprint(value, hasher, seen)
+    elif isinstance(value, ArrayBackend):  # numpy or autograd.numpy, same results
+        update("namespace", type(value).__name__)
+    elif isinstance(value, types.ModuleType):
+        update("namespace", value.__name__)
+    elif isinstance(value, (type, types.BuiltinFunctionType, np.ufunc)):
+        update("builtin", qualified_name(value))
+    else:
+        raise TypeError(f"values of type {type(value).__name__} have no fingerprint")
+
+
+def function_fingerprint(function, hasher, seen):
+    """The code object with its constants, the default arguments, the closure and the globals the code reads."""
+    code_fingerprint(function.__code__, hasher, seen)
+    fingerprint(function.__defaults__, hasher, seen)
+    fingerprint(function.__kwdefaults__, hasher, seen)
+    fingerprint(tuple(cell.cell_contents for cell in function.__closure__ or ()), hasher, seen)
+    for name in sorted(global_names(function.__code__)):
+        if name in function.__globals__:
+            fingerprint(name, hasher, seen)
+            fingerprint(function.__globals__[name], hasher, seen)
+
+
+def code_fingerprint(code, hasher, seen):
+    fingerprint((code.co_code, code.co_names, code.co_varnames, code.co_freevars, code.co_argcount), hasher, seen)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):  # nested functions and lambdas
+            code_fingerprint(constant, hasher, seen)
+        else:
+            fingerprint(constant, hasher, seen)
+
+
+def global_names(code):
+    """co_names of code and its nested code objects (attribute names that are not globals are skipped by the caller)."""
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names |= global_names(constant)
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def solver_source_hash():
+    """sha256 of the solver source files, library solver functions are hashed by name only."""
+    hasher = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for source in SOLVER_SOURCES:
+        path = os.path.join(root, source)
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(directory, name) for directory, _, names in os.walk(path) for name in names if name.endswith(".py")
+        )
+        for file in files:
+            hasher.update(os.path.relpath(file, root).encode() + b"\x1e")
+            with open(file, "rb") as f:
+                hasher.update(f.read())
+    return hasher.hexdigest()
+
+
+def cache_key(ode_problem, tableau, solver_class, tol, rtol=None, atol=None, **solver_options):
+    """sha256 hex digest of everything the solution depends on, None when a value has no fingerprint."""
+    hasher = hashlib.sha256()
+    description = (
+        CACHE_VERSION, solver_source_hash(), ode_problem, (tableau.A, tableau.b, tableau.c, tableau.b_hat),
+        qualified_name(solver_class), tol, rtol, atol, solver_options
+    )
+    try:
+        fingerprint(description, hasher, {})
+    except TypeError:
+        return None
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """
+    Directory of <key>.npy files. A hit refreshes the modification time of the entry, the entries
+    with the oldest modification times are deleted while the cache is larger than max_bytes.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, max_bytes: int = 2 ** 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key):
+        """The cached array of key, None on a miss."""
+        path = self.path(key)
+        try:
+            u = np.load(path)
+            os.utime(path)  # least recently used order
+        except (OSError, ValueError):  # missing, or evicted by another process
+            self.misses += 1
+            return None
+        self.hits += 1
+        return u
+
+    def put(self, key, u):
+        """Stores u under key (written to a temporary file first, concurrent solves never read partial files)."""
+        os.makedirs(self.directory, exist_ok=True)
+        file, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(file, "wb") as f:
+            np.save(f, np.asarray(u))
+        os.replace(temporary, self.path(key))
+        self.evict()
+
+    def entries(self):
+        """(modification time, size, path) of all entries, the least recently used first."""
+        entries = []
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".npy"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache fits into max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
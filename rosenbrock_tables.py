@@ -0,0 +1,157 @@
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Callable, Union
+
+from butcher_tables import read_only
+
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ROSENBROCK AND W-METHODS (linearly implicit, no Newton iteration):
+# every table returns gamma, a, C, m, m_hat, alpha, d, w_method in the transformed form of Hairer & Wanner
+#     (I / (h*gamma) - J) u_i = f(t_n + alpha_i*h, y_n + sum_{j<i} a_{ij}*u_j) + sum_{j<i} c_{ij}/h*u_j + d_i*h*f_t
+#     y_{n+1} = y_n + sum_i m_i*u_i,  the error estimate is sum_i (m_i - m_hat_i)*u_i
+# a W-method keeps its order with any matrix J (a stale or approximate Jacobian)
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+
+def LinearlyImplicitEuler():  # order 1, W-method
+    gamma = 1.
+    a = np.array([[0.]])
+    C = np.array([[0.]])
+    m = np.array([1.])
+    alpha = np.array([0.])
+    d = np.array([1.])
+    return gamma, a, C, m, None, alpha, d, True
+
+
+def ROS2Method():  # order 2(1), W-method, L-stable, Verwer, Spee, Blom & Hundsdorfer (1999)
+    gamma = 1 + 1 / np.sqrt(2)
+    a = np.array([
+        [0, 0],
+        [1 / gamma, 0]
+    ])
+    C = np.array([
+        [0, 0],
+        [-2 / gamma, 0]
+    ])
+    m = np.array([3 / (2 * gamma), 1 / (2 * gamma)])
+    m_hat = np.array([1 / gamma, 0])  # linearly implicit Euler with gamma
+    alpha = np.array([0, 1.])
+    d = np.array([gamma, -gamma])
+    return gamma, a, C, m, m_hat, alpha, d, True
+
+
+def ROS3PMethod():  # order 3, A-stable, Lang & Verwer (2001), fixed step only (see m_hat)
+    gamma = 1 / 2 + np.sqrt(3) / 6
+    a = np.array([
+        [0, 0, 0],
+        [1 / gamma, 0, 0],
+        [1 / gamma, 0, 0]
+    ])
+    C = np.array([
+        [0, 0, 0],
+        [-1.607695154586736, 0, 0],
+        [-3.464101615137755, -1.732050807568877, 0]
+    ])
+    m = np.array([2., 0.5773502691896258, 0.4226497308103742])
+    # the published embedded weights [2.113248654051871, 1, 0.4226497308103742] give an error estimate
+    # that vanishes for linear autonomous f (global error 1.7 on problem_system_1 at rtol = 1e-6),
+    # use RODAS3Method for adaptive steps
+    m_hat = None
+    alpha = np.array([0, 1., 1.])
+    d = np.array([0.7886751345948129, -0.2113248654051871, -1.077350269189626])
+    return gamma, a, C, m, m_hat, alpha, d, False
+
+
+def RODAS3Method():  # order 3(2), L-stable and stiffly accurate, Sandu, Verwer, Blom et al. (1997)
+    gamma = 1 / 2
+    a = np.array([
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+        [2, 0, 0, 0],
+        [2, 0, 1, 0]
+    ])
+    C = np.array([
+        [0, 0, 0, 0],
+        [4, 0, 0, 0],
+        [1, -1, 0, 0],
+        [1, -1, -8 / 3, 0]
+    ])
+    m = np.array([2, 0, 1, 1.])
+    m_hat = np.array([2, 0, 1, 0.])
+    alpha = np.array([0, 0, 1, 1.])
+    d = np.array([1 / 2, 3 / 2, 0, 0])
+    return gamma, a, C, m, m_hat, alpha, d, False
+
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# TABLEAU REGISTRY
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+ROSENBROCK_TABLES = {method.__name__: method for method in [LinearlyImplicitEuler, ROS2Method, ROS3PMethod, RODAS3Method]}
+
+
+def rosenbrock_order(alpha, Gamma, b, tol=1e-10):
+    """
+    Order (up to 3) from the Rosenbrock order conditions in the classical form, beta = alpha + Gamma
+    without its diagonal:
+    sum b_i = 1, sum b_i*beta_i = 1/2 - gamma, sum b_i*alpha_i^2 = 1/3, sum b_i*beta_ik*beta_k = 1/6 - gamma + gamma^2
+    """
+    gamma = Gamma[0, 0]
+    beta = alpha + np.tril(Gamma, -1)
+    alpha_sums, beta_sums = alpha.sum(axis=1), beta.sum(axis=1)
+    conditions = [
+        [b.sum() - 1],
+        [b @ beta_sums - (1 / 2 - gamma)],
+        [b @ alpha_sums ** 2 - 1 / 3, b @ beta @ beta_sums - (1 / 6 - gamma + gamma ** 2)],
+    ]
+    for order, residuals in enumerate(conditions):
+        if np.max(np.abs(residuals)) > tol:
+            return order
+    return len(conditions)
+
+
+@dataclass(frozen=True, eq=False)
+class RosenbrockTableau:
+    """Coefficients of a Rosenbrock or W-method with the classical form and the verified order (up to 3)."""
+    name: str
+    gamma: float
+    a: np.ndarray
+    C: np.ndarray
+    m: np.ndarray
+    m_hat: Union[np.ndarray, None]
+    alpha: np.ndarray  # nodes, the stage times are t_n + alpha_i * h
+    d: np.ndarray  # coefficients of the time derivative f_t
+    w_method: bool
+    order: int = field(init=False)
+    embedded_order: Union[int, None] = field(init=False)
+
+    def __post_init__(self):
+        set_field = lambda name, value: object.__setattr__(self, name, value)
+        for name in ("a", "C", "m", "m_hat", "alpha", "d"):
+            set_field(name, read_only(getattr(self, name)))
+        # classical form: Gamma^-1 = diag(1/gamma) - C, a = alpha * Gamma^-1, m = b * Gamma^-1
+        Gamma = np.linalg.inv(np.eye(self.s) / self.gamma - self.C)
+        alpha_matrix = self.a @ Gamma
+        set_field('order', rosenbrock_order(alpha_matrix, Gamma, self.m @ Gamma))
+        set_field('embedded_order', None if self.m_hat is None else rosenbrock_order(alpha_matrix, Gamma, self.m_hat @ Gamma))
+
+    @property
+    def s(self):
+        return len(self.m)
+
+    @property
+    def is_embedded(self):
+        return self.m_hat is not None
+
+
+rosenbrock_tableau_cache = {}
+
+
+def get_rosenbrock_tableau(method: Union[Callable, str]) -> RosenbrockTableau:
+    """The cached RosenbrockTableau of a table function (or its name in ROSENBROCK_TABLES)."""
+    name = method if isinstance(method, str) else method.__name__
+    if name not in rosenbrock_tableau_cache:
+        function = ROSENBROCK_TABLES[name] if isinstance(method, str) else method
+        rosenbrock_tableau_cache[name] = RosenbrockTableau(name, *function())
+    return rosenbrock_tableau_cache[name]
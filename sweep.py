@@ -0,0 +1,158 @@
+"""
+Parallel sweep driver: solves every problem x method x tolerance combination in a process pool
+and renders the figures after all solves are gathered (in parallel when they are saved to files).
+
+    python sweep.py [output directory]
+
+The solutions are cached on disk (see result_cache), re-running an unchanged sweep only reads them.
+
+Problems and Butcher tables are referenced by their registry names (ODE_PROBLEMS, BUTCHER_TABLES),
+only names and numbers are sent to the worker processes, the lambda right-hand sides are looked
+up there and never pickled.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from functools import partial
+
+import numpy as np
+
+import ode_solvers
+from ode_models import ODE_PROBLEMS
+from butcher_tables import ButcherTableau, get_tableau
+from plot_tools import FigureJob, generate_subplots, plot_decimated, render_figures
+from result_cache import ResultCache
+
+
+SWEEP_PROBLEMS = [
+    "problem_scalar_1", "problem_scalar_2",
+    "problem_nonatonomous_1", "problem_nonatonomous_2",
+    "problem_nonlinear_1", "problem_nonlinear_2",
+]
+SWEEP_METHODS = [
+    "ExplicitMidpointMethod", "KuttaThirdOrderMethod",
+    "GaussLegendreSixOrder", "CrankNicolsonMethodSecondOrder",
+    "DIRKThirdOrder", "DIRKFourOrder",
+]
+SWEEP_TOLERANCES = [1e-5]
+
+
+@dataclass(frozen=True)
+class SweepTask:
+    problem: str        # name in ODE_PROBLEMS
+    method: str         # name in BUTCHER_TABLES
+    tol: float          # solver (Newton) tolerance
+    solver: str = None  # solver class name in ode_solvers, chosen by the structure of the table when None
+    rtol: float = None  # relative tolerance, enables adaptive step size (embedded pairs only)
+
+
+def solver_for_tableau(tableau: ButcherTableau):
+    """The solver class that fits the structure of the table."""
+    if tableau.is_explicit:
+        return ode_solvers.ExplicitRungeKutta
+    if tableau.structure == "SDIRK":
+        return ode_solvers.DiagonallyImplicitRungeKutta
+    return ode_solvers.ImplicitRungeKutta
+
+
+def solve_task(task: SweepTask, cache: ResultCache = None):
+    """
+    Worker: one solve by main.solve, returns the task, the solution, the solver statistics and the max error.
+    A solution read from the cache has the status "cached" and no statistics.
+    """
+    import main  # main imports this module
+    problem = ODE_PROBLEMS[task.problem]
+    tableau = get_tableau(task.method)
+    solver_class = getattr(ode_solvers, task.solver) if task.solver else solver_for_tableau(tableau)
+    result = dict(asdict(task), solver=solver_class.__name__, u=None, error=float("nan"), stats=None)
+    start = time.perf_counter()
+    try:
+        stats = ode_solvers.SolverStatistics()
+        hits = cache.hits if cache is not None else 0
+        u = np.asarray(main.solve(
+            problem, solver_class, task.method, task.tol, rtol=task.rtol,
+            atol=None if task.rtol is None else task.rtol * 1e-2, cache=cache, stats=stats
+        ))
+        if cache is not None and cache.hits > hits:
+            result.update(u=u, status="cached")
+        else:
+            result.update(u=u, stats=stats.as_dict(), status="ok")
+        if problem.exact_test_solution:
+            result["error"] = float(np.max(np.abs(u[:, 1:] - problem.exact_test_solution(u[:, :1]))))
+    except ValueError as e:  # Newton did not converge, step size too small
+        result["status"] = str(e)
+    result["wall_time"] = time.perf_counter() - start
+    return result
+
+
+def sweep_tasks(problems=SWEEP_PROBLEMS, methods=SWEEP_METHODS, tolerances=SWEEP_TOLERANCES, adaptive=False):
+    """All problem x method x tolerance combinations, adaptive runs use the tolerance as rtol (embedded pairs only)."""
+    return [
+        SweepTask(problem, method, tol, rtol=tol if adaptive and get_tableau(method).is_embedded else None)
+        for problem in problems for method in methods for tol in tolerances
+    ]
+
+
+def run_sweep(tasks, processes: int = None, cache: ResultCache = None):
+    """
+    Solves the tasks in a pool of processes worker processes (all cores when None, in this
+    process when 1). With a cache, unchanged tasks are read from it (see main.solve).
+    Returns the results in the order of the tasks.
+    """
+    if processes == 1:
+        return [solve_task(task, cache) for task in tasks]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(partial(solve_task, cache=cache), tasks))
+
+
+def sweep_figure(problem_name: str, runs):
+    """One subplot per method with the solution for every tolerance of the runs of one problem."""
+    problem = ODE_PROBLEMS[problem_name]
+    methods = list(dict.fromkeys(r["method"] for r in runs))
+    figure, axes = generate_subplots(k=len(methods), row_wise=True)
+    if problem.exact_test_solution:
+        time_points_exact = np.linspace(problem.t0, problem.T, problem.number_of_points_to_discretization)
+        exact_solution = problem.exact_test_solution(time_points_exact[:, None])
+    for ax, method_name in zip(axes, methods):
+        for r in runs:
+            if r["method"] != method_name or r["u"] is None:
+                continue
+            plot_decimated(ax, r["u"][:, 0], r["u"][:, 1], label=f"tol = {r['rtol'] or r['tol']:g}")
+        if problem.exact_test_solution:
+            ax.plot(time_points_exact, exact_solution[:, 0], '--', label="Exact solution")
+        ax.grid(True)
+        ax.set_title(method_name)
+        ax.legend(fontsize="x-small")
+    figure.suptitle(f"Solution for {problem_name}")
+    return figure
+
+
+def plot_sweep(results, directory: str = None, processes: int = None):
+    """
+    One figure per problem (see sweep_figure). The figures are saved to directory as png files,
+    rendered in processes worker processes, and shown when no directory is given.
+    """
+    problems = {}
+    for r in results:
+        problems.setdefault(r["problem"], []).append(r)
+    if directory is not None:
+        jobs = [
+            FigureJob(os.path.join(directory, f"sweep_{problem_name}.png"), sweep_figure, (problem_name, runs))
+            for problem_name, runs in problems.items()
+        ]
+        render_figures(jobs, processes)
+        return
+    from matplotlib import pyplot as plt  # the solves do not need matplotlib
+    for problem_name, runs in problems.items():
+        sweep_figure(problem_name, runs)
+    plt.show()
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else None
+    results = run_sweep(sweep_tasks(), cache=ResultCache())
+    for r in results:
+        print(f"{r['problem']:24} {r['method']:32} {r['solver']:28} error {r['error']:.2e} {r['wall_time']:.3f} s {r['status']}")
+    plot_sweep(results, directory)
@@ -0,0 +1,30 @@
+import numpy
+
+from butcher_tables import get_tableau
+from ode_models import ODEModel, np
+from ode_solvers import AutoSwitchingRungeKutta
+
+J = numpy.array([[-500., 500.], [500., -500.]])  # eigenvalues 0 and -1000, row sums 0
+problem = ODEModel(f=lambda t, y: np.dot(y, J.T), exact_test_solution=None, t0=numpy.array([0.]), T=numpy.array([1.]), y0=numpy.array([1., 0.]))
+
+
+def solver():
+    return AutoSwitchingRungeKutta.from_tableau(problem, get_tableau("DormandPrinceMethod"), 1e-4, rtol=1e-6, atol=1e-8)
+
+
+def test_spectral_radius_without_eigenvalue_decomposition():
+    numpy.testing.assert_allclose(solver().estimate_spectral_radius(J), 1000., rtol=1e-6)
+
+
+def test_active_table_sets_the_embedded_order():
+    s = solver()
+    assert s.embedded_order == s.explicit.embedded_order
+    s.activate(s.implicit, 0.)
+    assert s.embedded_order == s.implicit.embedded_order != s.explicit.embedded_order
+
+
+def test_switches_to_the_implicit_table_on_the_stiff_problem():
+    s = solver()
+    u = s.solve()
+    assert "DIRKFourOrderEmbedded" in [name for _, name in s.switches]
+    numpy.testing.assert_allclose(u[-1, 1:], [0.5, 0.5], atol=1e-5)
@@ -0,0 +1,19 @@
+import numpy
+
+import main
+import ode_solvers
+from ode_models import ODEModel
+
+decay = ODEModel(
+    f=lambda t, y, p: -p[..., :1] * y, exact_test_solution=None,
+    t0=numpy.array([0.]), T=numpy.array([1.]), y0=numpy.array([1.]), params=numpy.array([1.])
+)
+
+
+def test_ensemble_accepts_list_params():
+    t, u = main.solve_ensemble(
+        decay, ode_solvers.ExplicitRungeKutta, "KuttaThirdOrderMethod", 1e-8,
+        y0=[[1.], [2.], [3.]], params=[[1.], [2.], [3.]]
+    )
+    assert u.shape == (len(t), 3, 1)
+    numpy.testing.assert_allclose(u[-1, :, 0], [1., 2., 3.] * numpy.exp(-numpy.array([1., 2., 3.])), rtol=1e-5)
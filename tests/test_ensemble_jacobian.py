@@ -0,0 +1,42 @@
+import numpy
+import pytest
+
+from butcher_tables import get_tableau
+from ode_models import ODEModel, np
+from ode_solvers import AutogradJacobian, DiagonallyImplicitRungeKutta
+
+
+def ensemble_problem(f, y0):
+    return ODEModel(f=f, exact_test_solution=None, t0=numpy.array([0.]), T=numpy.array([1.]), y0=y0)
+
+
+def test_autograd_jacobian_of_non_vectorized_ensemble():
+    # f is called once per trajectory, the stacked result has to stay differentiable
+    problem = ensemble_problem(lambda t, y: -y ** 2, numpy.array([[2.], [4.], [6.]]))
+    solver = DiagonallyImplicitRungeKutta.from_tableau(problem, get_tableau("DIRKFourOrder"), 1e-3)
+    assert isinstance(solver.jacobian_provider, AutogradJacobian)
+    J = solver.jacobian_provider(0., problem.y0)
+    assert J.shape == (3, 1, 1)
+    numpy.testing.assert_allclose(J.ravel(), [-4., -8., -12.])
+
+
+def test_stiff_non_vectorized_ensemble():
+    problem = ensemble_problem(lambda t, y: -1000. * y, numpy.array([[1.], [2.]]))
+    solver = DiagonallyImplicitRungeKutta.from_tableau(problem, get_tableau("DIRKFourOrder"), 1e-8)
+    u = solver.solve()
+    assert numpy.all(numpy.isfinite(u))
+    assert numpy.max(numpy.abs(u[-1, 1:])) < 1e-6
+
+
+@pytest.mark.parametrize("provider", ["autograd", "finite_differences"])
+def test_ensemble_jacobian_providers_agree_with_vectorized_f(provider):
+    y0 = numpy.array([[1., 2.], [3., 4.]])
+    f = lambda t, y: np.stack([y[..., 1], -np.sin(y[..., 0])], axis=-1)
+    vectorized = ODEModel(f=f, exact_test_solution=None, t0=numpy.array([0.]), T=numpy.array([1.]), y0=y0, vectorized=True)
+    looped = ensemble_problem(f, y0)
+    J = [
+        DiagonallyImplicitRungeKutta.from_tableau(problem, get_tableau("DIRKFourOrder"), 1e-3,
+                                                  jacobian_provider=provider).jacobian_provider(0., y0)
+        for problem in (vectorized, looped)
+    ]
+    numpy.testing.assert_allclose(J[1], J[0], rtol=1e-6, atol=1e-6)
@@ -0,0 +1,40 @@
+import numpy
+import pytest
+
+from butcher_tables import BUTCHER_TABLES, get_tableau
+from ode_models import ODEModel
+from ode_solvers import ExplicitRungeKutta, get_stepper
+
+EXPLICIT_TABLES = [name for name in BUTCHER_TABLES if get_tableau(name).is_explicit]
+
+
+def f(t, y):
+    return numpy.stack([y[..., 1], -numpy.sin(y[..., 0]) + t], axis=-1)
+
+
+@pytest.mark.parametrize("name", EXPLICIT_TABLES)
+def test_phi_is_the_weighted_sum_of_the_stages(name):
+    tableau = get_tableau(name)
+    stepper = get_stepper(tableau)
+    y = numpy.array([0.3, -0.2])
+    K = stepper.stages(f, 0.1, y, 0.05, numpy.zeros((tableau.s, 2)))
+    numpy.testing.assert_allclose(stepper.phi(f, 0.1, y, 0.05), tableau.b @ K, rtol=1e-14)
+
+
+@pytest.mark.parametrize("name, evaluations", [("DormandPrinceMethod", 6), ("BogackiShampineMethod", 3)])
+def test_phi_skips_the_fsal_stage(name, evaluations):
+    calls = []
+    stepper = get_stepper(get_tableau(name))
+    stepper.phi(lambda t, y: calls.append(t) or f(t, y), 0., numpy.array([0.3, -0.2]), 0.05)
+    assert len(calls) == stepper.phi_evaluations == evaluations
+
+
+def test_jit_stepper_matches_the_python_stepper():
+    pytest.importorskip("numba")
+    # numba compiles f written against plain numpy
+    problem = ODEModel(f=f, exact_test_solution=None, t0=numpy.array([0.]), T=numpy.array([2.]), y0=numpy.array([0.3, -0.2]))
+    tableau = get_tableau("DormandPrinceMethod")
+    jitted = ExplicitRungeKutta.from_tableau(problem, tableau, 1e-3, jit=True)
+    assert jitted.stepper.jit
+    plain = ExplicitRungeKutta.from_tableau(problem, tableau, 1e-3, generated=True)
+    numpy.testing.assert_allclose(jitted.solve(), plain.solve(), rtol=1e-12)
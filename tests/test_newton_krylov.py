@@ -0,0 +1,25 @@
+import numpy
+
+from ode_solvers.newton_krylov import JacobianOperator, KrylovSolver, NewtonOperator
+from ode_solvers.statistics import SolverStatistics
+
+J = numpy.diag(-numpy.logspace(0, 4, 50))
+
+
+def newton_operator():
+    y = numpy.ones(50)
+    return NewtonOperator(JacobianOperator(0., y, lambda v: J @ v), [[1.]], 0.1)
+
+
+def test_inexact_krylov_solve_is_not_a_newton_failure():
+    stats = SolverStatistics()
+    KrylovSolver(newton_operator(), stats, restart=2, maxiter=1).solve(numpy.ones(50))
+    assert stats.linear_solver_failures == 1
+    assert stats.convergence_failures == 0
+
+
+def test_converged_krylov_solve():
+    stats = SolverStatistics()
+    d = KrylovSolver(newton_operator(), stats, rtol=1e-10, maxiter=None).solve(numpy.ones(50))
+    numpy.testing.assert_allclose(d, 1 / (1 - 0.1 * numpy.diag(J)), rtol=1e-8)
+    assert stats.linear_solver_failures == 0 and stats.krylov_iterations > 0
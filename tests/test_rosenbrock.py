@@ -0,0 +1,18 @@
+import numpy
+import pytest
+
+from ode_models import problem_system_1
+from ode_solvers import RosenbrockMethod
+from rosenbrock_tables import get_rosenbrock_tableau
+
+
+def test_ros3p_is_fixed_step_only():
+    # its published embedded estimate vanishes for linear autonomous f
+    with pytest.raises(ValueError):
+        RosenbrockMethod.from_tableau(problem_system_1, get_rosenbrock_tableau("ROS3PMethod"), 1e-8, rtol=1e-6, atol=1e-8)
+
+
+def test_adaptive_rodas3_meets_the_tolerance_on_a_linear_system():
+    solver = RosenbrockMethod.from_tableau(problem_system_1, get_rosenbrock_tableau("RODAS3Method"), 1e-8, rtol=1e-6, atol=1e-8)
+    u = solver.solve()
+    assert numpy.max(numpy.abs(u[-1, 1:] - problem_system_1.exact_test_solution(u[-1, 0]))) < 1e-5
@@ -0,0 +1,23 @@
+import numpy
+
+import sweep
+from result_cache import ResultCache
+
+
+def test_second_sweep_is_read_from_the_cache(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    tasks = sweep.sweep_tasks(problems=["problem_scalar_1"], methods=["KuttaThirdOrderMethod", "DIRKFourOrder"])
+    first = sweep.run_sweep(tasks, processes=1, cache=cache)
+    second = sweep.run_sweep(tasks, processes=1, cache=cache)
+    assert [r["status"] for r in first] == ["ok", "ok"]
+    assert first[0]["stats"]["f_evaluations"] > 0
+    assert [r["status"] for r in second] == ["cached", "cached"]
+    for a, b in zip(first, second):
+        numpy.testing.assert_array_equal(a["u"], b["u"])
+        assert a["error"] == b["error"]
+
+
+def test_sweep_without_cache_solves_every_time(tmp_path):
+    tasks = sweep.sweep_tasks(problems=["problem_scalar_1"], methods=["KuttaThirdOrderMethod"])
+    assert sweep.run_sweep(tasks, processes=1)[0]["status"] == "ok"
+    assert sweep.run_sweep(tasks, processes=1)[0]["status"] == "ok"